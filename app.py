@@ -1,5 +1,7 @@
+import instrumentation
+instrumentation.page_start("home")
 import streamlit as st
-from utils import model, data, calculate_emi, get_recommendations, get_lat_lon 
+from utils import get_data
 import hashlib
 import json  
 from utils import login_form
@@ -28,11 +30,13 @@ st.markdown(hide_pages_style, unsafe_allow_html=True)
 # Show login if not logged in
 if not st.session_state.get("logged_in", False):
     login_form()
+    instrumentation.page_end()
     st.stop()
 
 # Show login if not logged in
 if not st.session_state.get("logged_in", False):
     login_form()
+    instrumentation.page_end()
     st.stop()
 
 # ----------------- Sidebar -----------------
@@ -40,6 +44,7 @@ st.sidebar.success(f"Logged in as: {st.session_state['username']}")
 if st.sidebar.button("Logout"):
     st.session_state["logged_in"] = False
     st.session_state["username"] = None
+    instrumentation.page_end()
     st.switch_page("app.py") 
 
 
@@ -77,8 +82,11 @@ st.write(
 )
 
 # Quick stats
+data = get_data()
 st.subheader("📈 Dataset Overview")
 st.write(f"Total Records: {len(data):,}")
 st.dataframe(data.head(10), use_container_width=True)
 
 st.success("✅ Use the sidebar to start exploring predictions and insights!")
+
+instrumentation.page_end()
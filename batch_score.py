@@ -0,0 +1,156 @@
+"""Score listing CSVs in fixed-size chunks.
+
+Usage:
+    python batch_score.py Bengaluru_House_Data.csv predictions.csv --chunksize 50000 --workers 4 [--intervals]
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from calibration import INTERVALS_PATH, load_intervals
+from cleaning import parse_bedrooms, parse_total_sqft
+from location_index import load_location_index
+from model_artifact import ArtifactError, load_scorer
+from scorer import FEATURES
+
+DEFAULT_CHUNKSIZE = 50_000
+PREDICTION_COLUMN = "predicted_price"
+INTERVAL_COLUMNS = ["predicted_low", "predicted_high"]
+
+_worker_scorer = None
+_worker_intervals = None
+_worker_locations = None
+
+
+def prepare_features(chunk, location_index):
+    """Apply the notebook cleaning to a raw or cleaned listings chunk"""
+    # Rare spellings go to 'other' as in training; unseen ones are matched fuzzily
+    location = location_index.match_many(chunk["location"]).astype("string")
+
+    total_sqft = chunk["total_sqft"]
+    if not pd.api.types.is_numeric_dtype(total_sqft):
+        total_sqft = parse_total_sqft(total_sqft)
+
+    if "bedrooms" in chunk.columns:
+        bedrooms = pd.to_numeric(chunk["bedrooms"], errors="coerce")
+    else:
+        bedrooms = parse_bedrooms(chunk["size"])
+
+    return pd.DataFrame({
+        "location": location,
+        "total_sqft": total_sqft,
+        "bath": pd.to_numeric(chunk["bath"], errors="coerce"),
+        "balcony": pd.to_numeric(chunk["balcony"], errors="coerce"),
+        "bedrooms": bedrooms,
+    }, index=chunk.index)
+
+
+def score_chunk(chunk, scorer, intervals=None, location_index=None):
+    """Return the chunk with a predicted_price column (lakhs, NaN where inputs are incomplete),
+    plus predicted_low / predicted_high when an interval table is given"""
+    if location_index is None:
+        location_index = load_location_index(scorer.locations)
+    features = prepare_features(chunk, location_index)
+    valid = features.notna().all(axis=1).to_numpy()
+    predictions = np.full(len(chunk), np.nan)
+    if valid.any():
+        predictions[valid] = scorer.predict(features[valid])
+    out = chunk.copy()
+    out[PREDICTION_COLUMN] = predictions
+    if intervals is not None:
+        low, high = np.full(len(chunk), np.nan), np.full(len(chunk), np.nan)
+        if valid.any():
+            low[valid], high[valid] = intervals.intervals(
+                features["location"][valid], features["bedrooms"][valid], predictions[valid]
+            )
+        out[INTERVAL_COLUMNS[0]] = low
+        out[INTERVAL_COLUMNS[1]] = high
+    return out
+
+
+def _load(model_path, with_intervals):
+    scorer = load_scorer(model_path)
+    intervals = load_intervals(scorer.locations, INTERVALS_PATH, scorer.version) if with_intervals else None
+    return scorer, intervals, load_location_index(scorer.locations)
+
+
+def _init_worker(model_path, with_intervals):
+    global _worker_scorer, _worker_intervals, _worker_locations
+    _worker_scorer, _worker_intervals, _worker_locations = _load(model_path, with_intervals)
+
+
+def _score_in_worker(chunk):
+    return score_chunk(chunk, _worker_scorer, _worker_intervals, _worker_locations)
+
+
+def _has_index_column(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.readline().startswith(",")
+
+
+def score_csv(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=1, model_path=None,
+              with_intervals=False):
+    """Stream input_path through the model into output_path; returns the number of rows written.
+
+    Only ``2 * workers`` chunks are held in memory at a time, so memory stays flat
+    regardless of the input size.
+    """
+    index_col = 0 if _has_index_column(input_path) else None
+    reader = pd.read_csv(input_path, chunksize=chunksize, index_col=index_col)
+    rows = 0
+    header = True
+
+    def write(scored):
+        nonlocal rows, header
+        scored.to_csv(output_path, mode="w" if header else "a", header=header, index=index_col is not None)
+        header = False
+        rows += len(scored)
+
+    if workers <= 1:
+        scorer, intervals, location_index = _load(model_path, with_intervals)
+        for chunk in reader:
+            write(score_chunk(chunk, scorer, intervals, location_index))
+    else:
+        # Fail here with the ArtifactError, not later as a broken worker pool
+        _load(model_path, with_intervals)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path, with_intervals)) as pool:
+            pending = deque()
+            for chunk in reader:
+                pending.append(pool.submit(_score_in_worker, chunk))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    if header:
+        # Empty input: still produce a file with the expected columns
+        columns = [*FEATURES, PREDICTION_COLUMN, *(INTERVAL_COLUMNS if with_intervals else [])]
+        pd.DataFrame(columns=columns).to_csv(output_path, index=False)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score a listings CSV with the house price model")
+    parser.add_argument("input", help="CSV shaped like Bengaluru_House_Data.csv or Cleaned_data.csv")
+    parser.add_argument("output", help="Where to write the scored CSV")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Processes to spread chunks across (0 = all cores)")
+    parser.add_argument("--model", help="Model artifact (.json) or pickle (.pkl); defaults to the artifact")
+    parser.add_argument("--intervals", action="store_true",
+                        help="Add predicted_low / predicted_high from models/price_intervals.json")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        rows = score_csv(args.input, args.output, args.chunksize, workers, args.model, args.intervals)
+    except ArtifactError as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"Scored {rows:,} rows -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
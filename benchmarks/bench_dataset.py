@@ -0,0 +1,92 @@
+"""Dataset load time and resident memory: CSV vs columnar (copied and memory-mapped).
+
+Each variant runs in a fresh interpreter. RSS is reported right after loading and
+after a full pass over every column (memory-mapped pages only count once touched).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_dataset [--scale 1 10 100] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.common import run_fresh
+from dataset import COLUMNAR_PATH, DATA_PATH, build_columnar
+
+_SNIPPET = """
+import json, time
+import numpy as np
+import pandas as pd
+import dataset
+
+base = rss_mb()
+t = time.perf_counter()
+data = {load}
+elapsed = time.perf_counter() - t
+loaded = rss_mb()
+for col in data.columns:
+    np.asarray(data[col].cat.codes if data[col].dtype == "category" else data[col]).sum()
+scanned = rss_mb()
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_after_load_mb": loaded - base,
+    "rss_after_scan_mb": scanned - base,
+    "frame_mb": data.memory_usage(deep=True).sum() / 2**20,
+}}))
+"""
+
+VARIANTS = {
+    "csv": "dataset.read_csv({csv!r})",
+    "columnar": "dataset.load_columnar({cols!r}, mmap=False)",
+    "columnar_mmap": "dataset.load_columnar({cols!r}, mmap=True)",
+}
+
+
+def scaled_inputs(scale, workdir):
+    """CSV + columnar copies of the dataset repeated `scale` times"""
+    if scale == 1:
+        return DATA_PATH, COLUMNAR_PATH
+    data = pd.read_csv(DATA_PATH, index_col=0)
+    big = pd.concat([data] * scale, ignore_index=True)
+    csv = os.path.join(workdir, f"data_x{scale}.csv")
+    big.to_csv(csv)
+    cols = os.path.join(workdir, f"data_x{scale}.cols")
+    build_columnar(csv, cols)
+    return csv, cols
+
+
+def run(scales, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            csv, cols = scaled_inputs(scale, workdir)
+            if scale == 1 and not os.path.exists(cols):
+                build_columnar(csv, cols)
+            for name, load in VARIANTS.items():
+                runs = [run_fresh(_SNIPPET.format(load=load.format(csv=csv, cols=cols))) for _ in range(repeat)]
+                results[f"x{scale}/{name}"] = min(runs, key=lambda r: r["seconds"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat)
+    print(f"{'variant':<22}{'load ms':>10}{'RSS load MB':>13}{'RSS scan MB':>13}{'frame MB':>10}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['seconds'] * 1000:>10.1f}{r['rss_after_load_mb']:>13.1f}"
+              f"{r['rss_after_scan_mb']:>13.1f}{r['frame_mb']:>10.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
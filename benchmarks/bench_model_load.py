@@ -0,0 +1,59 @@
+"""Model load time and resident memory: sklearn pickle vs the NumPy-only artifact.
+
+Each variant runs in a fresh interpreter, so the time includes importing
+whatever the loader needs (sklearn for the pickle).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_model_load [--repeat 5]
+"""
+import argparse
+import json
+
+from benchmarks.common import run_fresh
+
+_SNIPPET = """
+import json, sys, time
+import numpy as np
+base = rss_mb()
+t = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - t
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_mb() - base,
+    "sklearn_imported": "sklearn" in sys.modules,
+}}))
+"""
+
+VARIANTS = {
+    "pickle": "from scorer import load_model; model = load_model()",
+    "pickle+compile": "from scorer import FastScorer, load_model; model = FastScorer.from_pipeline(load_model())",
+    "artifact": "from model_artifact import load_artifact; model = load_artifact()",
+}
+
+
+def run(repeat):
+    results = {}
+    for name, load in VARIANTS.items():
+        runs = [run_fresh(_SNIPPET.format(load=load)) for _ in range(repeat)]
+        results[name] = min(runs, key=lambda r: r["seconds"])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print(f"{'variant':<18}{'load ms':>10}{'RSS MB':>10}  sklearn")
+    for name, r in results.items():
+        print(f"{name:<18}{r['seconds'] * 1000:>10.1f}{r['rss_mb']:>10.1f}  {r['sklearn_imported']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import subprocess
+import sys
+
+# Prepended to every measured snippet: current resident set size in MB
+RSS_HELPER = """
+import os
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+"""
+
+
+def run_fresh(code):
+    """Run a snippet in a fresh interpreter and parse the JSON it prints last"""
+    proc = subprocess.run(
+        [sys.executable, "-c", RSS_HELPER + code],
+        capture_output=True, text=True, check=True, cwd=os.getcwd(),
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
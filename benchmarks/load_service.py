@@ -0,0 +1,158 @@
+"""Load generator for prediction_service.py: requests per second and latency.
+
+``--concurrency`` asyncio clients each keep one connection open and send
+requests back to back for ``--duration`` seconds, with inputs drawn from the
+cleaned listings. With ``--spawn`` a service is started on a free port for
+the run (``--window-ms`` is passed through), otherwise ``--url`` is used.
+
+Usage (from the repository root):
+    python -m benchmarks.load_service --spawn [--concurrency 64] [--duration 10]
+        [--endpoint predict|recommend|mixed] [--window-ms 1] [--output load.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from dataset import load_data
+
+
+def sample_requests(n, seed=0):
+    """(path, payload) pairs built from real listings"""
+    data = load_data()
+    rows = data.sample(n, replace=True, random_state=seed)
+    out = []
+    for row in rows.itertuples(index=False):
+        out.append(("/predict", {
+            "location": row.location, "total_sqft": float(row.total_sqft), "bath": float(row.bath),
+            "balcony": float(row.balcony), "bedrooms": int(row.bedrooms),
+        }))
+        out.append(("/recommend", {
+            "location": row.location, "sqft": float(row.total_sqft), "bedrooms": int(row.bedrooms),
+            "price": float(row.price) * 100000,
+        }))
+    return out
+
+
+async def _client(host, port, requests, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            path, payload = random.choice(requests)
+            body = json.dumps(payload).encode()
+            started = time.perf_counter()
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(url, requests, concurrency, duration):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(parts.hostname, parts.port, requests, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def _get_json(url, timeout=2):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def spawn_service(window_ms, timeout=120):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "prediction_service.py", "--port", str(port), "--window-ms", str(window_ms)],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("prediction_service.py exited during startup")
+        try:
+            _get_json(url + "/health")
+            return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"prediction_service.py did not answer on {url} within {timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the prediction service")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true", help="Start a service for the run")
+    parser.add_argument("--window-ms", type=float, default=1.0, help="Batch window for --spawn")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--endpoint", choices=["predict", "recommend", "mixed"], default="mixed")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    requests = sample_requests(1000)
+    if args.endpoint != "mixed":
+        requests = [r for r in requests if r[0] == "/" + args.endpoint]
+
+    proc, url = spawn_service(args.window_ms) if args.spawn else (None, args.url)
+    try:
+        result = asyncio.run(run_load(url, requests, args.concurrency, args.duration))
+        result["server"] = _get_json(url + "/metrics")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    result.update(endpoint=args.endpoint, concurrency=args.concurrency, url=url)
+
+    print(f"{result['requests']:,} requests in {result['seconds']:.1f}s: {result['rps']:,.0f} req/s, "
+          f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+          f"{result['errors']} errors")
+    for path, stats in result["server"]["batches"].items():
+        print(f"  {path}: {stats['batches']:,} batches, mean size {stats['mean_size']:.1f}, max {stats['max_size']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
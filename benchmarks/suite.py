@@ -0,0 +1,199 @@
+"""Benchmark suite for the app's hot paths on 1x/10x/100x synthetic data.
+
+Covers model prediction (single row and batch, sklearn pipeline and the
+NumPy scorer), get_recommendations (index build and per-query latency),
+calculate_emi, dataset loading (CSV and columnar) and the Market Insights
+aggregations. Results are written as JSON; ``--compare`` checks them against a
+stored baseline and exits non-zero when a case got slower than the threshold.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --scale 1 10 100 --output baseline.json
+    python -m benchmarks.suite --scale 1 10 100 --compare baseline.json [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import write_csv
+from dataset import build_columnar, load_columnar, read_csv
+from insights import build_aggregates
+from model_artifact import load_scorer
+from recommender import RecommendationIndex
+from scorer import FEATURES, load_model
+from utils import calculate_emi
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.2
+# Differences below this are timer noise for the sub-millisecond cases
+MIN_DELTA_MS = 0.05
+QUERIES = 200
+
+
+def _stats(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {
+        "median_ms": float(np.median(samples)),
+        "min_ms": float(samples.min()),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "samples": int(len(samples)),
+    }
+
+
+def measure(fn, repeat, number=1):
+    """Per-call time of fn() over `repeat` rounds of `number` calls, after one warm-up"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t) * 1000 / number)
+    return _stats(samples)
+
+
+def measure_each(fn, args_list):
+    """Latency distribution of fn(*args) over a list of argument tuples"""
+    fn(*args_list[0])
+    samples = []
+    for args in args_list:
+        t = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t) * 1000)
+    return _stats(samples)
+
+
+# ---------------- Cases ----------------
+def bench_model(repeat):
+    """Scale-independent cases: single-row prediction and EMI"""
+    model = load_model()
+    scorer = load_scorer()
+    row = pd.DataFrame([["Whitefield", 1200.0, 2.0, 1.0, 2]], columns=FEATURES)
+    return {
+        "predict_single/pipeline": measure(lambda: model.predict(row), repeat, 20),
+        "predict_single/scorer": measure(lambda: scorer.predict_one("Whitefield", 1200.0, 2.0, 1.0, 2), repeat, 1000),
+        "calculate_emi": measure(lambda: calculate_emi(8_000_000, 8.5, 20), repeat, 10_000),
+    }
+
+
+def bench_scale(scale, repeat, workdir, seed=0):
+    csv = write_csv(scale, os.path.join(workdir, f"data_x{scale}.csv"), seed)
+    cols = os.path.join(workdir, f"data_x{scale}.cols")
+    build_columnar(csv, cols)
+
+    results = {
+        "dataset_load/csv": measure(lambda: read_csv(csv), repeat),
+        "dataset_load/columnar": measure(lambda: load_columnar(cols, mmap=False), repeat),
+        "dataset_load/columnar_mmap": measure(lambda: load_columnar(cols, mmap=True), repeat),
+    }
+    data = read_csv(csv)
+
+    model = load_model()
+    scorer = load_scorer()
+    features = data[FEATURES]
+    results["predict_batch/pipeline"] = measure(lambda: model.predict(features), repeat)
+    results["predict_batch/scorer"] = measure(lambda: scorer.predict(features), repeat)
+
+    results["recommendations/build_index"] = measure(lambda: RecommendationIndex(data), repeat)
+    index = RecommendationIndex(data)
+    sample = data.sample(min(QUERIES, len(data)), random_state=seed)
+    # The dataset's price is in lakhs; RecommendationIndex.query takes rupees, as utils passes it
+    queries = list(zip(sample["location"], sample["total_sqft"], sample["bedrooms"], sample["price"] * 100000))
+    results["recommendations/query"] = measure_each(index.query, queries)
+
+    results["insights/build_aggregates"] = measure(lambda: build_aggregates(data), repeat)
+    return {f"x{scale}/{name}": r for name, r in results.items()}
+
+
+def run(scales, repeat, seed=0):
+    results = {f"model/{name}": r for name, r in bench_model(repeat).items()}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            results.update(bench_scale(scale, repeat, workdir, seed))
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "scales": scales,
+        "results": results,
+    }
+
+
+# ---------------- Comparison ----------------
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Rows of (case, baseline ms, current ms, ratio, status) for cases present in both"""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, None, result["median_ms"], None, "new"))
+            continue
+        old, new = base["median_ms"], result["median_ms"]
+        ratio = new / old if old else float("inf")
+        if ratio > 1 + threshold and new - old > MIN_DELTA_MS:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold) and old - new > MIN_DELTA_MS:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, old, new, ratio, status))
+    return rows
+
+
+def _print_results(results):
+    print(f"{'case':<40}{'median ms':>12}{'min ms':>12}{'p95 ms':>12}")
+    for name, r in results["results"].items():
+        print(f"{name:<40}{r['median_ms']:>12.4g}{r['min_ms']:>12.4g}{r['p95_ms']:>12.4g}")
+
+
+def _print_comparison(rows):
+    print(f"{'case':<40}{'baseline ms':>13}{'current ms':>13}{'ratio':>8}  status")
+    for name, old, new, ratio, status in rows:
+        old_s = f"{old:.4g}" if old is not None else "-"
+        ratio_s = f"{ratio:.2f}" if ratio is not None else "-"
+        print(f"{name:<40}{old_s:>13}{new:>13.4g}{ratio_s:>8}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON (e.g. to store a baseline)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown of the median that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.compare:
+        _print_results(results)
+        return
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    _print_comparison(rows)
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
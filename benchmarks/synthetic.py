@@ -0,0 +1,60 @@
+"""Synthetic listings shaped like Cleaned_data.csv at any multiple of its size.
+
+Every location keeps its share of the listings: each location's rows are
+resampled ``scale`` times with replacement, then total_sqft is jittered by up to
++/-5% and price moves with it, so price per sqft, bedroom mix and the location
+distribution stay those of the real data.
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic 10 /tmp/data_x10.csv [--seed 0]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from dataset import DATA_PATH
+
+SQFT_JITTER = 0.05
+
+
+def generate(scale, seed=0, source=DATA_PATH):
+    """DataFrame with ``scale`` times the rows of ``source`` (same columns, fresh index)"""
+    data = pd.read_csv(source, index_col=0)
+    if scale == 1:
+        return data
+    rng = np.random.default_rng(seed)
+    codes, _ = pd.factorize(data["location"])
+    # Same per-location counts, times `scale`: draw rows within each location group
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes)
+    starts = np.repeat(np.cumsum(counts) - counts, counts * scale)
+    sizes = np.repeat(counts, counts * scale)
+    picks = order[starts + (rng.random(len(starts)) * sizes).astype(np.intp)]
+    rng.shuffle(picks)
+
+    out = data.iloc[picks].reset_index(drop=True)
+    factor = 1 + rng.uniform(-SQFT_JITTER, SQFT_JITTER, len(out))
+    out["total_sqft"] = (out["total_sqft"] * factor).round(1)
+    out["price"] = (out["price"] * factor).round(2)
+    return out
+
+
+def write_csv(scale, path, seed=0):
+    """Write the synthetic data in Cleaned_data.csv's layout (leading index column)"""
+    generate(scale, seed).to_csv(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scale", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_csv(args.scale, args.output, args.seed)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Price intervals from conformal residual quantiles.
+
+The notebook's train/test split was not seeded, so we cannot tell which rows
+the shipped model saw. Calibration therefore refits the model being calibrated
+(same estimator and hyperparameters: OLS via incremental.IncrementalState for
+the notebook pipeline and "linear", the training.CANDIDATES entry named in the
+artifact header otherwise) on K location-stratified folds and scores each
+listing with the fit that did not see it, which gives every listing a held-out
+residual (price - prediction, in lakhs). These are split-conformal calibration
+sets pooled over the folds.
+
+For each (location, bedroom bucket) group, the lower and upper residual
+quantiles at the requested coverage are stored, with the usual finite-sample
+correction. Groups with fewer than MIN_GROUP_SIZE residuals fall back to the
+location, then to the bedroom bucket, then to all listings. The table is
+written to models/price_intervals.json next to the model. Loading resolves the
+fallbacks into a dense (location, bucket) array, so an interval is one array
+lookup, or one fancy-indexing operation for a batch. Intervals always contain
+the prediction itself.
+
+Rebuild with:
+    python calibration.py [Cleaned_data.csv] [--model models/house_prediction_model.json|.pkl]
+                          [--coverage 0.8] [--folds 5]
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from common import atomic_write
+from dataset import DATA_PATH, file_hash
+from incremental import IncrementalState, TARGET
+from model_artifact import ARTIFACT_PATH, ArtifactError, params_hash, pipeline_params, read_artifact
+from scorer import NUMERIC_FEATURES, FastScorer, load_model
+
+INTERVALS_PATH = "models/price_intervals.json"
+INTERVALS_FORMAT = "house-price-intervals"
+INTERVALS_VERSION = 1
+DEFAULT_COVERAGE = 0.8
+DEFAULT_FOLDS = 5
+MIN_GROUP_SIZE = 20
+# Buckets for 1, 2, 3 and 4+ bedrooms
+MAX_BEDROOM_BUCKET = 4
+
+
+def bedroom_bucket(bedrooms):
+    return np.clip(np.asarray(bedrooms, dtype=np.int64), 1, MAX_BEDROOM_BUCKET) - 1
+
+
+# ---------------- Calibration ----------------
+def model_to_calibrate(path=ARTIFACT_PATH):
+    """(params, estimator name, unfitted estimator or None for OLS) for the artifact
+    or pickle at ``path``"""
+    if path.endswith(".pkl"):
+        from sklearn.base import clone
+        from sklearn.linear_model import LinearRegression
+
+        model = load_model(path)
+        final = model.steps[-1][1]
+        name = type(final).__name__
+        return pipeline_params(model), name, None if type(final) is LinearRegression else clone(final)
+    header, params = read_artifact(path)
+    name = header.get("estimator", "linear")
+    if name == "linear":
+        return params, name, None
+    from training import CANDIDATES
+    if name not in CANDIDATES:
+        raise ArtifactError(f"{path}: cannot refit unknown estimator {name!r}")
+    return params, name, CANDIDATES[name]
+
+
+def _fold_scorer(train, estimator=None):
+    """Scorer fitted on ``train`` with ``estimator`` (OLS when None)"""
+    if estimator is None:
+        return IncrementalState().update(train).scorer()
+    from training import Design, fit_final
+    p = fit_final(Design.from_frame(train), estimator)
+    return FastScorer.from_params(p["locations"], p["mean"], p["scale"], p["coef"], p["intercept"])
+
+
+def out_of_fold_residuals(data, folds=DEFAULT_FOLDS, seed=0, estimator=None):
+    """price - prediction for every listing, each from a model fitted without its fold"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(data))
+    # Stratify by location: every location with >= `folds` listings is in every training set
+    shuffled = data.iloc[order]
+    rank = shuffled.groupby("location", sort=False).cumcount().to_numpy()
+    fold = np.empty(len(data), dtype=np.intp)
+    fold[order] = rank % folds
+
+    residuals = np.empty(len(data))
+    for k in range(folds):
+        held_out = fold == k
+        scorer = _fold_scorer(data[~held_out], estimator)
+        test = data[held_out]
+        known = test["location"].isin(scorer.location_index).to_numpy()
+        predicted = np.full(len(test), np.nan)
+        predicted[known] = scorer.predict(test[known])
+        residuals[held_out] = test[TARGET].to_numpy() - predicted
+    return residuals
+
+
+def conformal_bounds(residuals, coverage):
+    """(lower, upper) residual quantiles with the split-conformal (n + 1) correction"""
+    n = len(residuals)
+    alpha = 1 - coverage
+    hi_level = min(np.ceil((n + 1) * (1 - alpha / 2)) / n, 1.0)
+    lo_level = max(np.floor((n + 1) * (alpha / 2)) / n, 0.0)
+    lower, upper = np.quantile(residuals, [lo_level, hi_level])
+    return [float(lower), float(upper)]
+
+
+def build_intervals(data, coverage=DEFAULT_COVERAGE, folds=DEFAULT_FOLDS, seed=0, estimator=None):
+    """Residual-quantile tables for every group with enough listings"""
+    data = data.dropna(subset=["location", TARGET] + NUMERIC_FEATURES).reset_index(drop=True)
+    residuals = out_of_fold_residuals(data, folds, seed, estimator)
+    valid = ~np.isnan(residuals)
+    frame = pd.DataFrame({
+        "location": data["location"].astype(str).to_numpy()[valid],
+        "bucket": bedroom_bucket(data["bedrooms"].to_numpy()[valid]),
+        "residual": residuals[valid],
+    })
+
+    def table(keys):
+        out = {}
+        for key, group in frame.groupby(keys, sort=True)["residual"]:
+            if len(group) >= MIN_GROUP_SIZE:
+                key = "|".join(str(k) for k in key) if isinstance(key, tuple) else str(key)
+                out[key] = conformal_bounds(group.to_numpy(), coverage)
+        return out
+
+    return {
+        "global": conformal_bounds(frame["residual"].to_numpy(), coverage),
+        "buckets": table("bucket"),
+        "locations": table("location"),
+        "location_buckets": table(["location", "bucket"]),
+        "residuals": int(len(frame)),
+    }
+
+
+def save_intervals(tables, path=INTERVALS_PATH, metadata=None):
+    header = {
+        "format": INTERVALS_FORMAT,
+        "version": INTERVALS_VERSION,
+        "max_bedroom_bucket": MAX_BEDROOM_BUCKET,
+        "min_group_size": MIN_GROUP_SIZE,
+        **(metadata or {}),
+        **tables,
+    }
+    with atomic_write(path) as f:
+        json.dump(header, f, indent=1)
+    return header
+
+
+def calibrate(data_path=DATA_PATH, output=INTERVALS_PATH, model_path=ARTIFACT_PATH,
+              coverage=DEFAULT_COVERAGE, folds=DEFAULT_FOLDS):
+    params, name, estimator = model_to_calibrate(model_path)
+    tables = build_intervals(pd.read_csv(data_path), coverage, folds, estimator=estimator)
+    return save_intervals(tables, output, {
+        "coverage": coverage,
+        "folds": folds,
+        "estimator": name,
+        # Parameter hash, so the artifact and the pickle of the same model both match
+        "model_version": params_hash(params),
+        "data_hash": file_hash(data_path),
+    })
+
+
+# ---------------- Lookup ----------------
+class PriceIntervals:
+    """Interval lookup aligned with a scorer's locations (unknown locations use the
+    bedroom-bucket fallback)"""
+
+    def __init__(self, tables, locations):
+        self.coverage = tables["coverage"]
+        self.model_version = tables.get("model_version")
+        self.version = f"{tables.get('data_hash')}:{self.coverage}:{tables.get('folds')}"
+        self.locations = list(locations)
+        self.location_index = {loc: i for i, loc in enumerate(self.locations)}
+        n_buckets = tables["max_bedroom_bucket"]
+
+        # Row len(locations) holds the fallback for locations outside the table
+        bounds = np.empty((len(self.locations) + 1, n_buckets, 2))
+        for b in range(n_buckets):
+            bucket_bounds = tables["buckets"].get(str(b), tables["global"])
+            bounds[-1, b] = bucket_bounds
+            for i, loc in enumerate(self.locations):
+                bounds[i, b] = tables["location_buckets"].get(
+                    f"{loc}|{b}", tables["locations"].get(loc, bucket_bounds)
+                )
+        self.bounds = bounds
+
+    def interval(self, location, bedrooms, predicted):
+        """(lower, upper) around one prediction, in the prediction's units (lakhs)"""
+        row = self.location_index.get(location, len(self.locations))
+        lower, upper = self.bounds[row, bedroom_bucket(bedrooms)]
+        # The price floor of 0 must not push the range past the prediction itself
+        return min(max(predicted + lower, 0.0), predicted), max(predicted + upper, predicted)
+
+    def intervals(self, locations, bedrooms, predicted):
+        """Vectorized interval(): arrays of lower and upper bounds"""
+        rows = pd.Series(locations).map(self.location_index).fillna(len(self.locations))
+        bounds = self.bounds[rows.to_numpy(dtype=np.intp), bedroom_bucket(bedrooms)]
+        predicted = np.asarray(predicted, dtype=np.float64)
+        low = np.minimum(np.maximum(predicted + bounds[:, 0], 0.0), predicted)
+        return low, np.maximum(predicted + bounds[:, 1], predicted)
+
+
+def load_intervals(locations, path=INTERVALS_PATH, model_version=None):
+    """PriceIntervals from the artifact; ArtifactError if it is missing, of another
+    format, or calibrated for a different model than ``model_version``"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tables = json.load(f)
+    except FileNotFoundError as e:
+        raise ArtifactError(f"{path}: not found") from e
+    if tables.get("format") != INTERVALS_FORMAT or tables.get("version") != INTERVALS_VERSION:
+        raise ArtifactError(f"{path}: not a {INTERVALS_FORMAT} v{INTERVALS_VERSION} table")
+    if model_version is not None and tables.get("model_version") != model_version:
+        raise ArtifactError(f"{path}: calibrated for a different model; rerun calibration.py")
+    return PriceIntervals(tables, locations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute conformal price intervals")
+    parser.add_argument("data", nargs="?", default=DATA_PATH)
+    parser.add_argument("--output", default=INTERVALS_PATH)
+    parser.add_argument("--model", default=ARTIFACT_PATH,
+                        help="Artifact (.json) or pickle (.pkl) whose estimator is refitted per fold")
+    parser.add_argument("--coverage", type=float, default=DEFAULT_COVERAGE)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    args = parser.parse_args(argv)
+    header = calibrate(args.data, args.output, args.model, args.coverage, args.folds)
+    print(f"{args.output}: {header['residuals']:,} residuals, {len(header['location_buckets'])} location/bedroom "
+          f"groups, {len(header['locations'])} locations, global {header['global']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Data cleaning from house_price_prediction.ipynb as an importable pipeline.
+
+Turns a Bengaluru_House_Data.csv-shaped file into Cleaned_data.csv:
+
+1. drop area_type / availability / society and rows with missing values
+2. strip location names and bucket locations with <= 10 listings into 'other'
+3. bedrooms from size ('2 BHK' -> 2), total_sqft ranges ('1000-1200') to their midpoint
+4. drop listings under 300 sqft per bedroom or under 2000 per sqft
+
+The input is streamed in chunks: a first pass counts listings per location, a
+second pass cleans each chunk and appends it to the output.
+
+Usage:
+    python cleaning.py [Bengaluru_House_Data.csv] [Cleaned_data.csv] [--chunksize 100000]
+"""
+import argparse
+
+import pandas as pd
+
+RAW_DATA_PATH = "Bengaluru_House_Data.csv"
+CLEANED_DATA_PATH = "Cleaned_data.csv"
+DROP_COLUMNS = ["area_type", "availability", "society"]
+INPUT_COLUMNS = ["location", "size", "total_sqft", "bath", "balcony", "price"]
+OUTPUT_COLUMNS = ["location", "total_sqft", "bath", "balcony", "price", "bedrooms"]
+# Fixed so that every chunk parses the way the whole file would
+INPUT_DTYPES = {"location": str, "size": str, "total_sqft": str,
+                "bath": "float64", "balcony": "float64", "price": "float64"}
+RARE_LOCATION_MAX = 10
+MIN_SQFT_PER_BED = 300
+MIN_PRICE_PER_SQFT = 2000
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def parse_total_sqft(sqft):
+    """Vectorized version of the notebook's clean(): "a-b" ranges become their midpoint,
+    anything that is not a number becomes NaN"""
+    sqft = sqft.astype(str)
+    value = pd.to_numeric(sqft, errors="coerce").astype("float64")
+    is_range = sqft.str.count("-") == 1
+    if is_range.any():
+        parts = sqft[is_range].str.partition("-")
+        low = pd.to_numeric(parts[0], errors="coerce")
+        high = pd.to_numeric(parts[2], errors="coerce")
+        value[is_range] = (low + high) / 2
+    return value
+
+
+def parse_bedrooms(size):
+    """'2 BHK' / '4 Bedroom' -> 2 / 4 (NaN when the size is missing)"""
+    return pd.to_numeric(size.str.split(" ", n=1).str[0], errors="coerce")
+
+
+def _complete_rows(chunk):
+    chunk = chunk[INPUT_COLUMNS].dropna()
+    return chunk.assign(location=chunk["location"].str.strip())
+
+
+def count_locations(chunks):
+    """First pass: listings per (stripped) location among complete rows"""
+    counts = pd.Series(dtype="int64")
+    for chunk in chunks:
+        counts = counts.add(_complete_rows(chunk)["location"].value_counts(), fill_value=0)
+    return counts.astype("int64")
+
+
+def clean_chunk(chunk, rare_locations):
+    """Second pass: clean one chunk given the locations to bucket into 'other'"""
+    df = _complete_rows(chunk)
+    df["location"] = df["location"].where(~df["location"].isin(rare_locations), "other")
+    df["bedrooms"] = parse_bedrooms(df["size"])
+    df["total_sqft"] = parse_total_sqft(df["total_sqft"])
+    df = df.dropna()
+    df["bedrooms"] = df["bedrooms"].astype("int64")
+
+    df = df[df["total_sqft"] / df["bedrooms"] >= MIN_SQFT_PER_BED]
+    price_per_sqft = (df["price"] * 100000 / df["total_sqft"]).round(2)
+    return df.loc[price_per_sqft >= MIN_PRICE_PER_SQFT, OUTPUT_COLUMNS]
+
+
+def rare_locations_from_counts(counts):
+    return set(counts[counts <= RARE_LOCATION_MAX].index)
+
+
+def clean_frame(raw):
+    """Clean an in-memory raw DataFrame in one go"""
+    return clean_chunk(raw, rare_locations_from_counts(count_locations([raw])))
+
+
+def clean_file(input_path=RAW_DATA_PATH, output_path=CLEANED_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream input_path through both passes into output_path; returns the rows written"""
+    read = dict(chunksize=chunksize, dtype=INPUT_DTYPES)
+    counts = count_locations(pd.read_csv(input_path, usecols=INPUT_COLUMNS, **read))
+    rare = rare_locations_from_counts(counts)
+
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(input_path, usecols=lambda col: col not in DROP_COLUMNS, **read)):
+        cleaned = clean_chunk(chunk, rare)
+        cleaned.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0)
+        rows += len(cleaned)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild Cleaned_data.csv from the raw listings")
+    parser.add_argument("input", nargs="?", default=RAW_DATA_PATH)
+    parser.add_argument("output", nargs="?", default=CLEANED_DATA_PATH)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+    rows = clean_file(args.input, args.output, args.chunksize)
+    print(f"Wrote {rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Helpers shared by the stores, caches and queues.
+
+- ``atomic_write(path)`` writes a file through a temporary sibling that replaces
+  ``path`` only once it is complete; on error the temporary file is removed and
+  ``path`` is left as it was
+- ``file_lock(path)`` holds an exclusive lock on a sidecar lock file across
+  processes (fcntl on POSIX, msvcrt on Windows)
+- ``env_flag(name)`` reads a boolean switch such as GEOCODE_OFFLINE=1
+- ``ThreadLocalSQLite`` gives each thread its own WAL-mode connection
+"""
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        # LK_LOCK retries for ~10 s before raising; keep waiting like flock does
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# ---------------- Files ----------------
+@contextlib.contextmanager
+def atomic_write(path, mode="w", fsync=False, permissions=None, **open_kwargs):
+    """File object for a temp file next to ``path`` that replaces it on success.
+
+    Text modes default to UTF-8. ``fsync`` flushes the data to disk before the
+    replace; ``permissions`` is applied to the new file (mkstemp creates 0600).
+    """
+    if "b" not in mode:
+        open_kwargs.setdefault("encoding", "utf-8")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if permissions is not None:
+            os.chmod(tmp, permissions)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on ``lock_path`` across processes (not threads: pair it with a
+    threading.Lock)"""
+    with open(lock_path, "a+b") as f:
+        _lock_file(f)
+        try:
+            yield
+        finally:
+            _unlock_file(f)
+
+
+# ---------------- Environment ----------------
+def env_flag(name):
+    """True when the environment variable is set to 1/true/yes"""
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+# ---------------- SQLite ----------------
+class ThreadLocalSQLite:
+    """Base for SQLite-backed stores: ``_connect()`` returns this thread's connection
+    to ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread; Streamlit runs each session on its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,160 @@
+"""Compact columnar copy of Cleaned_data.csv.
+
+The dataset is stored as a directory with one .npy file per column plus a
+meta.json header, so every column can be memory-mapped instead of parsed:
+
+- location as int16 codes plus a dictionary (loaded as a pandas Categorical)
+- numeric columns downcast to float32/int8/int16/int32 only where that is lossless
+- derived columns (price_per_sqft) precomputed
+
+meta.json records the sha256 of the source CSV; a stale copy is ignored.
+
+Build with:
+    python dataset.py build [Cleaned_data.csv]
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+DATA_PATH = "Cleaned_data.csv"
+COLUMNAR_PATH = "Cleaned_data.cols"
+FORMAT_VERSION = 1
+
+_hash_cache = {}
+
+
+def file_hash(path):
+    """sha256 of a file, cached per (mtime, size) so repeated checks do not re-read it"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _hash_cache:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _hash_cache[key] = h.hexdigest()
+    return _hash_cache[key]
+
+
+def read_csv(path=DATA_PATH):
+    """The CSV path: parse the text and derive price_per_sqft"""
+    data = pd.read_csv(path)
+    data["price_per_sqft"] = (data["price"] * 100000) / data["total_sqft"]
+    return data
+
+
+def _compact(values):
+    """Smallest dtype that round-trips every value exactly"""
+    candidates = (np.int8, np.int16, np.int32) if values.dtype.kind in "iu" else ()
+    if values.dtype.kind == "f":
+        if np.isfinite(values).all() and (values == np.round(values)).all():
+            candidates = (np.int8, np.int16, np.int32)
+        candidates += (np.float32,)
+    for dtype in candidates:
+        converted = values.astype(dtype)
+        if np.array_equal(converted.astype(values.dtype), values):
+            return converted
+    return values
+
+
+def csv_dtype(dtype):
+    """The dtype read_csv gives a column that the columnar copy holds as ``dtype``
+    (strings as categories, numbers narrowed by _compact)"""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return dtype.categories.dtype
+    if dtype.kind in "iu":
+        return np.dtype(np.int64)
+    if dtype.kind == "f":
+        return np.dtype(np.float64)
+    return dtype
+
+
+def build_columnar(csv_path=DATA_PATH, out_path=COLUMNAR_PATH):
+    data = read_csv(csv_path)
+    tmp_path = out_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for name in data.columns:
+        if name == "location":
+            codes, categories = pd.factorize(data[name], sort=True)
+            values = codes.astype(np.int16)
+            column = {"name": name, "kind": "category", "categories": [str(c) for c in categories]}
+        elif name == "price_per_sqft":
+            # Derived with a division: kept at full precision so results match the CSV path
+            values = data[name].to_numpy()
+            column = {"name": name, "kind": "numeric"}
+        else:
+            values = _compact(data[name].to_numpy())
+            column = {"name": name, "kind": "numeric"}
+        column["file"] = f"{len(columns):02d}.npy"
+        column["dtype"] = str(values.dtype)
+        np.save(os.path.join(tmp_path, column["file"]), values)
+        columns.append(column)
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": int(len(data)),
+        "source_hash": file_hash(csv_path),
+        "columns": columns,
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(out_path, ignore_errors=True)
+    os.replace(tmp_path, out_path)
+    return meta
+
+
+def read_meta(path=COLUMNAR_PATH):
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_columnar(path=COLUMNAR_PATH, mmap=True):
+    meta = read_meta(path)
+    if meta["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {meta['version']}")
+    columns = {}
+    for column in meta["columns"]:
+        values = np.load(os.path.join(path, column["file"]), mmap_mode="r" if mmap else None)
+        if column["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+        columns[column["name"]] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+@timed("dataset.load")
+def load_data(csv_path=DATA_PATH, columnar_path=COLUMNAR_PATH, mmap=True):
+    """Dataset from the columnar copy when it is up to date with the CSV, else from the CSV.
+
+    ``attrs["source_hash"]`` records the CSV content hash either way.
+    """
+    source_hash = file_hash(csv_path)
+    data = None
+    try:
+        if read_meta(columnar_path)["source_hash"] == source_hash:
+            data = load_columnar(columnar_path, mmap=mmap)
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    if data is None:
+        data = read_csv(csv_path)
+    data.attrs["source_hash"] = source_hash
+    return data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("usage: python dataset.py build [Cleaned_data.csv]")
+    source = sys.argv[2] if len(sys.argv) > 2 else DATA_PATH
+    meta = build_columnar(source)
+    print(f"{COLUMNAR_PATH}: {meta['rows']:,} rows")
+    for column in meta["columns"]:
+        print(f"  {column['name']:<15} {column['dtype']}")
@@ -0,0 +1,233 @@
+"""Persistent geocode store for Bangalore locations.
+
+Coordinates are kept in geocode_cache.json keyed by location name. Lookups go
+through an in-memory LRU first, then the on-disk store, then the shipped
+location_coordinates.csv table, and only then (unless offline) Nominatim,
+outside the lock and with a timeout that fits the caller's
+deadline. Locations Nominatim does not know are cached too, so they are not
+retried before NEGATIVE_TTL; timeouts and network errors are not.
+
+Fill the store for every location in the dataset with:
+    python geocode.py precompute
+
+location_coordinates.csv (location, lat, lon, source) is the shipped table of
+coordinates for the dataset's locations, so distance features work on a fresh
+checkout. Rebuild it from the store (after precompute) with:
+    python geocode.py table
+"""
+import argparse
+import csv
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from common import atomic_write, env_flag
+from instrumentation import span
+
+GEOCODE_CACHE = "geocode_cache.json"
+COORDINATES_TABLE = "location_coordinates.csv"
+USER_AGENT = "house_price_app"
+# Failed lookups are retried after a week
+NEGATIVE_TTL = 7 * 24 * 3600
+LRU_SIZE = 1024
+# Seconds per Nominatim request: page lookups must fit the page's deadline
+LOOKUP_TIMEOUT = 3
+PRECOMPUTE_TIMEOUT = 10
+
+
+class GeocodeCache:
+    def __init__(self, path=GEOCODE_CACHE, offline=None, lru_size=LRU_SIZE, table=COORDINATES_TABLE):
+        self.path = path
+        # GEOCODE_OFFLINE=1 disables every network lookup
+        self.offline = env_flag("GEOCODE_OFFLINE") if offline is None else offline
+        self.lru_size = lru_size
+        self.table_path = table
+        self._lru = OrderedDict()
+        self._store = None
+        self._table = None
+        self._geolocator = None
+        self._lock = threading.Lock()
+
+    # ---------------- On-disk store ----------------
+    def _load_store(self):
+        if self._store is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._store = json.load(f)
+            except FileNotFoundError:
+                self._store = {}
+        return self._store
+
+    def _save_store(self):
+        with atomic_write(self.path) as f:
+            json.dump(self._store, f, indent=2, sort_keys=True)
+
+    # ---------------- LRU ----------------
+    def _remember(self, location, coords):
+        self._lru[location] = coords
+        self._lru.move_to_end(location)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    # ---------------- Network ----------------
+    def _geocode(self, location, timeout):
+        with self._lock:
+            if self._geolocator is None:
+                from geopy.geocoders import Nominatim
+                self._geolocator = Nominatim(user_agent=USER_AGENT)
+        with span("nominatim", external=True):
+            loc = self._geolocator.geocode(f"{location}, Bangalore, India", timeout=timeout)
+        return (loc.latitude, loc.longitude) if loc else None
+
+    def _fetch(self, location, save=True, timeout=PRECOMPUTE_TIMEOUT):
+        """Nominatim lookup (no lock held while it runs); the answer is stored,
+        including "not found", but a timeout or network error is not"""
+        try:
+            coords = self._geocode(location, timeout)
+        except Exception:
+            return None
+        entry = {"lat": coords[0], "lon": coords[1]} if coords else {"failed_at": time.time()}
+        with self._lock:
+            self._load_store()[location] = entry
+            if save:
+                self._save_store()
+        return coords
+
+    def _retry_due(self, entry):
+        return "failed_at" in entry and time.time() - entry["failed_at"] > NEGATIVE_TTL
+
+    # ---------------- Lookups ----------------
+    def _table_coords(self, location):
+        if self._table is None:
+            self._table = load_coordinate_table(self.table_path) if self.table_path else {}
+        return self._table.get(location)
+
+    def get(self, location, timeout=LOOKUP_TIMEOUT):
+        """(lat, lon) for a location, or (None, None) if unknown.
+
+        Order: LRU, the store's coordinates, the shipped table, then (unless a
+        recent "not found" is stored, or offline) Nominatim. Only coordinates go
+        into the LRU, so a "not found" is re-checked against NEGATIVE_TTL.
+        """
+        with self._lock:
+            if location in self._lru:
+                self._lru.move_to_end(location)
+                return self._lru[location]
+            entry = self._load_store().get(location)
+            if entry is not None and "lat" in entry:
+                coords = entry["lat"], entry["lon"]
+            else:
+                coords = self._table_coords(location)
+            if coords is not None:
+                self._remember(location, coords)
+                return coords
+            if self.offline or (entry is not None and not self._retry_due(entry)):
+                # An offline miss is not stored, so it cannot hide a later online lookup
+                return None, None
+
+        coords = self._fetch(location, timeout=timeout)
+        if coords is None:
+            return None, None
+        with self._lock:
+            self._remember(location, coords)
+        return coords
+
+    def coordinates(self):
+        """All stored {location: (lat, lon)} pairs, skipping failed lookups"""
+        return {
+            loc: (entry["lat"], entry["lon"])
+            for loc, entry in self._load_store().items()
+            if "lat" in entry
+        }
+
+    def precompute(self, locations, retry_failed=False, delay=1.0):
+        """Geocode every location not yet in the store (Nominatim allows 1 request/second)"""
+        store = self._load_store()
+        todo = [
+            loc for loc in locations
+            if loc not in store or (retry_failed and "failed_at" in store[loc])
+        ]
+        for i, loc in enumerate(todo):
+            if i:
+                time.sleep(delay)
+            coords = self._fetch(loc, save=False)
+            print(f"[{i + 1}/{len(todo)}] {loc}: {coords or 'not found'}")
+            # Save as we go so an interrupted run keeps its progress
+            if (i + 1) % 20 == 0:
+                self._save_store()
+        if todo:
+            self._save_store()
+        self._lru.clear()
+        return len(todo)
+
+
+def load_coordinate_table(path=COORDINATES_TABLE):
+    """{location: (lat, lon)} from the shipped coordinates table ({} if missing)"""
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return {row["location"]: (float(row["lat"]), float(row["lon"])) for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+def write_coordinate_table(locations, cache, path=COORDINATES_TABLE):
+    """Table for ``locations`` from the store; rows the store cannot place are kept
+    from the existing table. Returns the number of rows written."""
+    previous = {}
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            previous = {row["location"]: row for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        pass
+    stored = cache.coordinates()
+    rows = []
+    for loc in sorted(locations):
+        if loc in stored:
+            rows.append({"location": loc, "lat": stored[loc][0], "lon": stored[loc][1], "source": "nominatim"})
+        elif loc in previous:
+            rows.append(previous[loc])
+    # Shipped with the repo: readable like any checked-out file
+    with atomic_write(path, newline="", permissions=0o644) as f:
+        writer = csv.DictWriter(f, fieldnames=["location", "lat", "lon", "source"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GeocodeCache()
+    return _default_cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the offline geocode store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pre = sub.add_parser("precompute", help="Geocode every location in the cleaned dataset")
+    pre.add_argument("--data", default="Cleaned_data.csv")
+    pre.add_argument("--cache", default=GEOCODE_CACHE)
+    pre.add_argument("--retry-failed", action="store_true", help="Retry locations that failed before")
+    table = sub.add_parser("table", help=f"Write {COORDINATES_TABLE} for the dataset's locations from the store")
+    table.add_argument("--data", default="Cleaned_data.csv")
+    table.add_argument("--cache", default=GEOCODE_CACHE)
+    table.add_argument("--output", default=COORDINATES_TABLE)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+    locations = sorted(pd.read_csv(args.data, usecols=["location"])["location"].unique())
+    if args.command == "table":
+        written = write_coordinate_table(locations, GeocodeCache(args.cache, offline=True), args.output)
+        print(f"Wrote {written} of {len(locations)} location(s) to {args.output}")
+        return
+    cache = GeocodeCache(args.cache, offline=False)
+    done = cache.precompute(locations, retry_failed=args.retry_failed)
+    print(f"Geocoded {done} new location(s); {len(cache.coordinates())} stored in {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
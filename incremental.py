@@ -0,0 +1,203 @@
+"""Incremental retraining of the linear model from sufficient statistics.
+
+The state holds, for the vector [total_sqft, bath, balcony, bedrooms, price,
+one-hot location...], the row count, the mean and the co-moment matrix
+sum((v - mean)(v - mean)^T). New batches are merged with the parallel
+(Chan et al.) update, so folding in a batch costs O(batch rows + locations^2)
+regardless of how much history the state already covers. A location never
+seen before simply adds a row/column to the state.
+
+Solving the standardized normal equations from the state gives the same
+StandardScaler + LinearRegression model as a full refit on all rows seen so far.
+
+Usage:
+    python incremental.py init Cleaned_data.csv
+    python incremental.py update new_listings.csv
+    python incremental.py export [--output models/house_prediction_model.json]
+    python incremental.py verify Cleaned_data.csv   # compare with a full sklearn refit
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_artifact import ARTIFACT_PATH, save_artifact
+from scorer import FastScorer, NUMERIC_FEATURES
+
+STATE_PATH = "models/incremental_state.npz"
+STATE_VERSION = 1
+TARGET = "price"
+_DENSE = NUMERIC_FEATURES + [TARGET]
+
+
+class IncrementalState:
+    def __init__(self, locations=(), n=0, mean=None, comoment=None):
+        self.locations = list(locations)
+        self.location_index = {loc: i for i, loc in enumerate(self.locations)}
+        dim = len(_DENSE) + len(self.locations)
+        self.n = int(n)
+        self.mean = np.zeros(dim) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.comoment = np.zeros((dim, dim)) if comoment is None else np.asarray(comoment, dtype=np.float64)
+
+    # ---------------- Persistence ----------------
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        with np.load(path, allow_pickle=False) as state:
+            if int(state["version"]) != STATE_VERSION:
+                raise ValueError(f"{path}: unsupported state version {int(state['version'])}")
+            return cls(state["locations"].tolist(), int(state["n"]), state["mean"], state["comoment"])
+
+    def save(self, path=STATE_PATH):
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, version=STATE_VERSION, locations=np.asarray(self.locations, dtype=str),
+            n=self.n, mean=self.mean, comoment=self.comoment,
+        )
+        os.replace(tmp, path)
+
+    # ---------------- Updates ----------------
+    def _add_locations(self, new):
+        k = len(new)
+        self.locations.extend(new)
+        self.location_index = {loc: i for i, loc in enumerate(self.locations)}
+        self.mean = np.concatenate([self.mean, np.zeros(k)])
+        self.comoment = np.pad(self.comoment, ((0, k), (0, k)))
+
+    def _batch_stats(self, batch):
+        """(n, mean, comoment) of one batch, built from per-location sums instead of
+        a dense one-hot matrix"""
+        dense = batch[_DENSE].to_numpy(dtype=np.float64)
+        codes = batch["location"].map(self.location_index).to_numpy(dtype=np.intp)
+        n_b = len(dense)
+        n_loc = len(self.locations)
+
+        dense_mean = dense.mean(axis=0)
+        centered = dense - dense_mean
+        counts = np.bincount(codes, minlength=n_loc).astype(np.float64)
+        loc_sums = np.zeros((n_loc, len(_DENSE)))
+        np.add.at(loc_sums, codes, centered)
+
+        d = len(_DENSE)
+        comoment = np.empty((d + n_loc, d + n_loc))
+        comoment[:d, :d] = centered.T @ centered
+        comoment[d:, :d] = loc_sums
+        comoment[:d, d:] = loc_sums.T
+        comoment[d:, d:] = np.diag(counts) - np.outer(counts, counts) / n_b
+        return n_b, np.concatenate([dense_mean, counts / n_b]), comoment
+
+    def update(self, batch):
+        """Fold a DataFrame with location, the numeric features and price into the state"""
+        batch = batch.dropna(subset=["location"] + _DENSE)
+        if batch.empty:
+            return self
+        new = [loc for loc in pd.unique(batch["location"]) if loc not in self.location_index]
+        if new:
+            self._add_locations([str(loc) for loc in new])
+
+        n_b, mean_b, comoment_b = self._batch_stats(batch)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+        return self
+
+    # ---------------- Solving ----------------
+    def params(self):
+        """Artifact parameters (locations sorted like OneHotEncoder, one-hot columns first)"""
+        if self.n < 2:
+            raise ValueError("Need at least two rows to fit")
+        d = len(_DENSE)
+        y = d - 1
+        order = d + np.argsort(np.asarray(self.locations, dtype=str), kind="stable")
+        features = np.concatenate([order, np.arange(len(NUMERIC_FEATURES))])
+
+        mean = self.mean[features]
+        var = np.diag(self.comoment)[features] / self.n
+        scale = np.sqrt(var)
+        # Constant columns are left unscaled, as StandardScaler does
+        scale[scale < 10 * np.finfo(np.float64).eps * np.maximum(np.abs(mean), 1)] = 1.0
+
+        gram = self.comoment[np.ix_(features, features)] / np.outer(scale, scale)
+        rhs = self.comoment[features, y] / scale
+        # Minimum-norm solution, as lstsq gives LinearRegression: the one-hot columns
+        # are collinear, so the Gram matrix is singular
+        eigval, eigvec = np.linalg.eigh(gram)
+        keep = eigval > eigval.max() * len(eigval) * np.finfo(np.float64).eps
+        coef = eigvec[:, keep] @ ((eigvec[:, keep].T @ rhs) / eigval[keep])
+        return {
+            "locations": [self.locations[i - d] for i in order],
+            "mean": mean, "scale": scale, "coef": coef, "intercept": self.mean[y],
+        }
+
+    def scorer(self):
+        p = self.params()
+        return FastScorer.from_params(p["locations"], p["mean"], p["scale"], p["coef"], p["intercept"])
+
+    def export(self, path=ARTIFACT_PATH):
+        return save_artifact(self.params(), path, {"trained_rows": self.n, "trainer": "incremental"})
+
+
+def fold_csv(state, path, chunksize=100_000):
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        state.update(chunk)
+    return state
+
+
+def check_against_refit(data, n_batches=5, seed=0):
+    """Largest prediction difference between the incremental model (fed in batches)
+    and a full sklearn refit on the same rows"""
+    from sklearn.compose import make_column_transformer
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    data = data.sample(frac=1, random_state=seed).reset_index(drop=True)
+    # Sort by location within the shuffle so later batches introduce new locations
+    data = data.sort_values("location", kind="stable").reset_index(drop=True)
+    state = IncrementalState()
+    for batch in np.array_split(np.arange(len(data)), n_batches):
+        state.update(data.iloc[batch])
+
+    features = ["location"] + NUMERIC_FEATURES
+    col_trans = make_column_transformer(
+        (OneHotEncoder(sparse_output=False), ["location"]), remainder="passthrough"
+    )
+    model = make_pipeline(col_trans, StandardScaler(), LinearRegression())
+    model.fit(data[features], data[TARGET])
+    return float(np.abs(model.predict(data[features]) - state.scorer().predict(data)).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental retraining from sufficient statistics")
+    parser.add_argument("--state", default=STATE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    init = sub.add_parser("init", help="Start a new state from a cleaned CSV")
+    init.add_argument("data")
+    update = sub.add_parser("update", help="Fold a batch of cleaned listings into the state")
+    update.add_argument("data")
+    export = sub.add_parser("export", help="Write a model artifact from the state")
+    export.add_argument("--output", default=ARTIFACT_PATH)
+    verify = sub.add_parser("verify", help="Compare batched training with a full sklearn refit")
+    verify.add_argument("data")
+    verify.add_argument("--batches", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        diff = check_against_refit(pd.read_csv(args.data), args.batches)
+        print(f"max |incremental - full refit| = {diff:.3g} lakhs")
+        return
+    if args.command == "export":
+        header = IncrementalState.load(args.state).export(args.output)
+        print(f"{args.output}: {header['trained_rows']:,} rows, {header['n_locations']} locations")
+        return
+
+    state = IncrementalState() if args.command == "init" else IncrementalState.load(args.state)
+    before = state.n
+    fold_csv(state, args.data).save(args.state)
+    print(f"{args.state}: +{state.n - before:,} rows, {state.n:,} total, {len(state.locations)} locations")
+
+
+if __name__ == "__main__":
+    main()
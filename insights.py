@@ -0,0 +1,145 @@
+"""Precomputed aggregates for the Market Insights page.
+
+The page renders from small summaries (per-location stats, histogram bin
+counts, 2-D bin counts for the price-per-sqft vs area chart, box-plot
+quantiles and the correlation matrix) whose size does not grow with the number
+of listings. They are cached in market_insights.json (runtime data, not
+committed) together with a content hash of the data file and rebuilt only
+when that hash or the format version changes.
+
+Rebuild by hand with:
+    python insights.py [Cleaned_data.csv]
+"""
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common import atomic_write
+from dataset import DATA_PATH, file_hash, read_csv
+from instrumentation import timed
+
+INSIGHTS_PATH = "market_insights.json"
+FORMAT_VERSION = 2
+PRICE_BINS = 50
+# total_sqft x price_per_sqft grid; each axis spans its 0.5-99.5 percentile range
+SCATTER_BINS = (60, 40)
+SCATTER_RANGE = (0.005, 0.995)
+TOP_LOCATIONS = 8
+CORR_COLUMNS = ["price", "total_sqft", "bath", "balcony", "bedrooms", "price_per_sqft"]
+
+
+def _box_stats(values):
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        "q1": float(q1), "median": float(median), "q3": float(q3),
+        "lowerfence": float(inside.min()), "upperfence": float(inside.max()),
+        "mean": float(values.mean()), "count": int(len(values)),
+        "outliers": int(len(values) - len(inside)),
+    }
+
+
+def _scatter_bins(data):
+    """2-D bin counts of total_sqft x price_per_sqft, overall and for the top locations"""
+    x = data["total_sqft"].to_numpy(dtype=np.float64)
+    y = data["price_per_sqft"].to_numpy(dtype=np.float64)
+    nx, ny = SCATTER_BINS
+    x_edges = np.linspace(*np.nanquantile(x, SCATTER_RANGE), nx + 1)
+    y_edges = np.linspace(*np.nanquantile(y, SCATTER_RANGE), ny + 1)
+    ix = np.searchsorted(x_edges, x, side="right") - 1
+    iy = np.searchsorted(y_edges, y, side="right") - 1
+    # Values equal to the upper edge belong to the last bin
+    ix[x == x_edges[-1]] = nx - 1
+    iy[y == y_edges[-1]] = ny - 1
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    # 'other' is the training bucket for rare locations, not a place to highlight
+    counts_by_location = data["location"].value_counts()
+    top = counts_by_location.index[counts_by_location.index != "other"][:TOP_LOCATIONS]
+    group = pd.Categorical(data["location"], categories=top).codes.astype(np.int64)
+    group[group < 0] = len(top)  # everything else
+    cell = (group * nx + ix) * ny + iy
+    counts = np.bincount(cell[inside], minlength=(len(top) + 1) * nx * ny).reshape(len(top) + 1, nx, ny)
+
+    groups = []
+    for name, grid in zip([str(name) for name in top] + ["All other locations"], counts):
+        bx, by = np.nonzero(grid)
+        # Sparse: bin indices into the edges above
+        groups.append({"location": name, "ix": bx.tolist(), "iy": by.tolist(),
+                       "count": grid[bx, by].astype(int).tolist()})
+    return {
+        "x_edges": x_edges.tolist(),
+        "y_edges": y_edges.tolist(),
+        "count": counts.sum(axis=0).astype(int).tolist(),
+        "outside": int((~inside).sum()),
+        "top_locations": groups,
+    }
+
+
+def build_aggregates(data):
+    """Summaries behind every Market Insights chart; ``data`` needs price_per_sqft"""
+    by_location = data.groupby("location", observed=True).agg(
+        count=("price", "size"),
+        avg_price=("price", "mean"),
+        avg_price_per_sqft=("price_per_sqft", "mean"),
+    ).sort_values("avg_price_per_sqft", ascending=False)
+
+    bedroom_counts = data["bedrooms"].value_counts().sort_index()
+    price_counts, price_edges = np.histogram(data["price"].to_numpy(), bins=PRICE_BINS)
+
+    boxes = {
+        str(bedrooms): _box_stats(group.to_numpy())
+        for bedrooms, group in data.groupby("bedrooms")["price"]
+    }
+
+    corr = data[CORR_COLUMNS].corr()
+    return {
+        "version": FORMAT_VERSION,
+        "rows": int(len(data)),
+        "locations": {
+            "location": by_location.index.tolist(),
+            "count": by_location["count"].astype(int).tolist(),
+            "avg_price": by_location["avg_price"].tolist(),
+            "avg_price_per_sqft": by_location["avg_price_per_sqft"].tolist(),
+        },
+        "bedroom_hist": {
+            "bedrooms": bedroom_counts.index.astype(int).tolist(),
+            "count": bedroom_counts.astype(int).tolist(),
+        },
+        "price_hist": {"edges": price_edges.tolist(), "count": price_counts.astype(int).tolist()},
+        "price_by_bedrooms": boxes,
+        "scatter_bins": _scatter_bins(data),
+        "corr": {"columns": CORR_COLUMNS, "values": corr.to_numpy().round(6).tolist()},
+    }
+
+
+def _write(aggregates, path):
+    with atomic_write(path) as f:
+        json.dump(aggregates, f)
+
+
+@timed()
+def load_aggregates(data_path=DATA_PATH, insights_path=INSIGHTS_PATH):
+    """Aggregates for data_path, rebuilt (and saved) if the data changed since the last build"""
+    digest = file_hash(data_path)
+    try:
+        with open(insights_path, "r", encoding="utf-8") as f:
+            aggregates = json.load(f)
+        if aggregates.get("data_hash") == digest and aggregates.get("version") == FORMAT_VERSION:
+            return aggregates
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    aggregates = build_aggregates(read_csv(data_path))
+    aggregates["data_hash"] = digest
+    _write(aggregates, insights_path)
+    return aggregates
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    result = load_aggregates(path)
+    print(f"{INSIGHTS_PATH}: {result['rows']:,} rows, data hash {result['data_hash'][:12]}")
@@ -0,0 +1,220 @@
+"""Lightweight timing and counters for the app's hot paths.
+
+Enable with INSTRUMENTATION=1. Then:
+
+- ``@timed("name")`` and ``with span("name"):`` record durations into
+  process-wide histograms and into the current rerun's span list;
+  ``external=True`` also counts the call as an external request
+  (Nominatim, Overpass, gspread) and exceptions are counted as errors
+- ``count(metric, label, value)`` bumps a counter (e.g. payload bytes)
+- ``page_start(name)`` / ``page_end()`` bracket a page script; page_end shows
+  the rerun's timings in a sidebar expander and periodically writes every
+  histogram and counter to METRICS_PATH in Prometheus text format. Pages call
+  page_end before ``st.stop()``, ``st.rerun()`` and ``st.switch_page()`` too,
+  so reruns cut short are recorded; a second page_end in the same rerun is a
+  no-op
+
+When disabled, ``timed`` returns the function unchanged and ``span`` returns a
+shared no-op context manager, so instrumented code runs as before.
+"""
+import atexit
+import contextlib
+import functools
+import os
+import threading
+import time
+
+from common import atomic_write, env_flag
+
+METRICS_PATH = os.environ.get("METRICS_PATH", "metrics.prom")
+EXPORT_INTERVAL = 15
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXTERNAL_CALLS = "external_calls"
+ERRORS = "errors"
+PAYLOAD_BYTES = "payload_bytes"
+
+
+ENABLED = env_flag("INSTRUMENTATION")
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_local = threading.local()
+_last_export = 0.0
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+
+# ---------------- Recording ----------------
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(metric, label, value=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[metric, label] = _counters.get((metric, label), 0) + value
+
+
+class _Span:
+    __slots__ = ("name", "external", "start", "entry")
+
+    def __init__(self, name, external):
+        self.name = name
+        self.external = external
+
+    def __enter__(self):
+        depth = getattr(_local, "depth", 0)
+        spans = getattr(_local, "spans", None)
+        # Reserve the slot now so a parent is listed before its nested spans
+        self.entry = [depth, self.name, None] if spans is not None else None
+        if self.entry is not None:
+            spans.append(self.entry)
+        _local.depth = depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _local.depth -= 1
+        if self.entry is not None:
+            self.entry[2] = elapsed
+        observe(self.name, elapsed)
+        if self.external:
+            count(EXTERNAL_CALLS, self.name)
+        if exc_type is not None:
+            count(ERRORS, self.name)
+        return False
+
+
+def span(name, external=False):
+    """Context manager timing its block under ``name``"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, external)
+
+
+def timed(name=None, external=False):
+    """Decorator timing every call under ``name`` (module.function by default)"""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(label, external):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------------- Prometheus export ----------------
+def _escape(label):
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """Every histogram and counter in the Prometheus text exposition format"""
+    with _lock:
+        histograms = {name: (list(h.buckets), h.count, h.sum) for name, h in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP app_duration_seconds Time spent in instrumented functions and blocks",
+        "# TYPE app_duration_seconds histogram",
+    ]
+    for name, (buckets, total, seconds) in sorted(histograms.items()):
+        label = _escape(name)
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'app_duration_seconds_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'app_duration_seconds_bucket{{name="{label}",le="+Inf"}} {total}')
+        lines.append(f'app_duration_seconds_sum{{name="{label}"}} {seconds:.6f}')
+        lines.append(f'app_duration_seconds_count{{name="{label}"}} {total}')
+
+    for metric in sorted({metric for metric, _ in counters}):
+        lines.append(f"# TYPE app_{metric}_total counter")
+        for (m, label), value in sorted(counters.items()):
+            if m == metric:
+                lines.append(f'app_{metric}_total{{name="{_escape(label)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None):
+    """Atomically write prometheus_text() to ``path`` (METRICS_PATH by default)"""
+    global _last_export
+    path = path or METRICS_PATH
+    with atomic_write(path) as f:
+        f.write(prometheus_text())
+    _last_export = time.monotonic()
+
+
+def _export_at_exit():
+    if _histograms or _counters:
+        write_metrics()
+
+
+if ENABLED:
+    atexit.register(_export_at_exit)
+
+
+# ---------------- Pages ----------------
+def page_start(name):
+    """Start collecting this rerun's spans (call at the top of a page script)"""
+    if not ENABLED:
+        return
+    _local.spans = []
+    _local.depth = 0
+    _local.page = name
+    _local.page_started = time.perf_counter()
+
+
+def page_end():
+    """Record the page's total time, show the debug panel and export when due"""
+    spans = getattr(_local, "spans", None)
+    if not ENABLED or spans is None:
+        return
+    _local.spans = None
+    total = time.perf_counter() - _local.page_started
+    observe(f"page.{_local.page}", total)
+    debug_panel(_local.page, total, spans)
+    if time.monotonic() - _last_export > EXPORT_INTERVAL:
+        write_metrics()
+
+
+def debug_panel(page, total, spans):
+    import streamlit as st
+
+    with st.sidebar.expander(f"⏱️ Timings: {page} ({total * 1000:.0f} ms)"):
+        for depth, name, seconds in spans:
+            if seconds is None:
+                continue
+            st.text(f"{'  ' * depth}{name}: {seconds * 1000:.1f} ms")
+        with _lock:
+            counters = sorted(_counters.items())
+        if counters:
+            st.caption("Process totals")
+            for (metric, label), value in counters:
+                st.text(f"{metric}[{label}]: {value:,}")
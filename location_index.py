@@ -0,0 +1,175 @@
+"""Location lookup shared by the predict form and batch scoring.
+
+``LocationIndex.match`` resolves a raw location string to one of the model's
+categories, in this order:
+
+1. the stripped string is a category
+2. the stripped string appears in the raw listings: use the label training
+   gave it (spellings with <= 10 listings were bucketed into 'other')
+3. its normalized form (lowercase, punctuation collapsed) names a category
+4. the closest category, if it is close enough: trigram overlap picks the
+   candidates, which are accepted on high overlap (reordered words) or a high
+   difflib ratio (typos such as 'Whitefeild'), best mean of the two first
+5. 'other'
+
+The aliases for step 2 are precomputed from Bengaluru_House_Data.csv into
+models/location_aliases.json:
+    python location_index.py build [Bengaluru_House_Data.csv]
+"""
+import json
+import re
+import sys
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from cleaning import RAW_DATA_PATH, count_locations, rare_locations_from_counts
+from common import atomic_write
+from dataset import file_hash
+
+ALIASES_PATH = "models/location_aliases.json"
+ALIASES_FORMAT = "location-aliases"
+ALIASES_VERSION = 1
+OTHER = "other"
+# A fuzzy candidate is accepted with either score at or above its threshold
+MIN_TRIGRAM_SIMILARITY = 0.8
+MIN_EDIT_SIMILARITY = 0.85
+FUZZY_CANDIDATES = 5
+MATCH_CACHE_SIZE = 65536
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name):
+    return _NON_ALNUM.sub(" ", str(name).lower()).strip()
+
+
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationIndex:
+    def __init__(self, categories, aliases=None):
+        self.categories = list(categories)
+        self.category_set = set(self.categories)
+        self.choices = sorted(self.categories)
+        self.aliases = dict(aliases or {})
+        self.normalized = {}
+        for category in self.categories:
+            self.normalized.setdefault(normalize(category), category)
+
+        self._names = list(self.normalized)
+        self._sizes = []
+        self._postings = defaultdict(list)
+        for i, name in enumerate(self._names):
+            grams = trigrams(name)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(i)
+        self._cache = {}
+
+    # ---------------- Fuzzy search ----------------
+    def _similar(self, normalized, prefix_bonus=False):
+        """[(dice coefficient over trigrams, normalized name)] for names sharing a trigram"""
+        grams = trigrams(normalized)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] += 1
+        scored = []
+        for i, n in shared.items():
+            score = 2 * n / (len(grams) + self._sizes[i])
+            if prefix_bonus and self._names[i].startswith(normalized):
+                score += 1
+            scored.append((score, self._names[i]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+    def search(self, query, limit=10):
+        """[(category, score)] best first; prefix matches rank above fuzzy ones"""
+        query = normalize(query)
+        if not query:
+            return []
+        scored = self._similar(query, prefix_bonus=True)[:limit]
+        return [(self.normalized[name], min(score, 1.0)) for score, name in scored]
+
+    # ---------------- Matching ----------------
+    def _resolve(self, raw):
+        if raw in self.category_set:
+            return raw
+        if raw in self.aliases:
+            return self.aliases[raw]
+        normalized = normalize(raw)
+        if normalized in self.normalized:
+            return self.normalized[normalized]
+        best, best_score = OTHER, 0.0
+        for dice, name in self._similar(normalized)[:FUZZY_CANDIDATES]:
+            ratio = SequenceMatcher(None, normalized, name).ratio()
+            if dice < MIN_TRIGRAM_SIMILARITY and ratio < MIN_EDIT_SIMILARITY:
+                continue
+            if (dice + ratio) / 2 > best_score:
+                best, best_score = self.normalized[name], (dice + ratio) / 2
+        return best
+
+    def match(self, location):
+        """Category for one raw location string"""
+        raw = str(location).strip()
+        category = self._cache.get(raw)
+        if category is None:
+            category = self._resolve(raw)
+            if len(self._cache) >= MATCH_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[raw] = category
+        return category
+
+    def match_many(self, locations):
+        """Vectorized match(): each distinct value is resolved once; NaN stays NaN"""
+        locations = pd.Series(locations)
+        distinct = locations.dropna().unique()
+        return locations.map({value: self.match(value) for value in distinct})
+
+
+# ---------------- Aliases ----------------
+def build_aliases(raw_path=RAW_DATA_PATH):
+    """Raw location spellings that training bucketed into 'other'"""
+    counts = count_locations(pd.read_csv(raw_path, usecols=["location", "size", "total_sqft", "bath",
+                                                             "balcony", "price"], chunksize=100_000))
+    return {location: OTHER for location in sorted(rare_locations_from_counts(counts))}
+
+
+def save_aliases(aliases, path=ALIASES_PATH, source=RAW_DATA_PATH):
+    header = {
+        "format": ALIASES_FORMAT,
+        "version": ALIASES_VERSION,
+        "source_hash": file_hash(source),
+        "aliases": aliases,
+    }
+    with atomic_write(path) as f:
+        json.dump(header, f, indent=1, ensure_ascii=False)
+    return header
+
+
+def load_aliases(path=ALIASES_PATH):
+    """Alias table, or {} when it has not been built"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if header.get("format") != ALIASES_FORMAT or header.get("version") != ALIASES_VERSION:
+        raise ValueError(f"{path}: not a {ALIASES_FORMAT} v{ALIASES_VERSION} file")
+    return header["aliases"]
+
+
+def load_location_index(categories, path=ALIASES_PATH):
+    return LocationIndex(categories, load_aliases(path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        sys.exit("usage: python location_index.py build [Bengaluru_House_Data.csv]")
+    source = sys.argv[2] if len(sys.argv) > 2 else RAW_DATA_PATH
+    header = save_aliases(build_aliases(source), ALIASES_PATH, source)
+    print(f"{ALIASES_PATH}: {len(header['aliases'])} aliases")
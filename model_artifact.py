@@ -0,0 +1,163 @@
+"""Sklearn-free model artifact.
+
+The fitted OneHotEncoder categories, StandardScaler mean/scale and
+LinearRegression coefficients are written as a small JSON header plus an .npz
+payload. The header carries a format version and the payload's sha256, and the
+payload is loaded with allow_pickle=False, so loading executes no code and
+needs only NumPy.
+
+Export the current pickle with:
+    python model_artifact.py export [models/house_prediction_model.pkl]
+"""
+import hashlib
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+from instrumentation import timed
+from scorer import FEATURES, MODEL_PATH, NUMERIC_FEATURES, FastScorer, load_model
+
+ARTIFACT_PATH = "models/house_prediction_model.json"
+ARTIFACT_FORMAT = "house-price-linear"
+ARTIFACT_VERSION = 1
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def params_hash(params):
+    """Identifies a model by its parameters, whichever file it was loaded from"""
+    h = hashlib.sha256(json.dumps([str(loc) for loc in params["locations"]]).encode())
+    for key in ("mean", "scale", "coef", "intercept"):
+        h.update(np.ascontiguousarray(params[key], dtype="<f8").tobytes())
+    return h.hexdigest()
+
+
+def pipeline_params(model):
+    """Parameters of the notebook's pipeline, one-hot columns first"""
+    col_trans, scaler, lr = (step for _, step in model.steps)
+    n = len(lr.coef_)
+    return {
+        "locations": np.asarray(col_trans.named_transformers_["onehotencoder"].categories_[0], dtype=str),
+        "mean": scaler.mean_ if scaler.with_mean else np.zeros(n),
+        "scale": scaler.scale_ if scaler.with_std else np.ones(n),
+        "coef": np.asarray(lr.coef_, dtype=np.float64),
+        "intercept": np.float64(lr.intercept_),
+    }
+
+
+def save_artifact(params, path=ARTIFACT_PATH, metadata=None):
+    """Write <path> (JSON header) and the .npz payload next to it"""
+    payload_path = os.path.splitext(path)[0] + ".npz"
+    np.savez_compressed(
+        payload_path,
+        locations=np.asarray(params["locations"], dtype=str),
+        mean=np.asarray(params["mean"], dtype=np.float64),
+        scale=np.asarray(params["scale"], dtype=np.float64),
+        coef=np.asarray(params["coef"], dtype=np.float64),
+        intercept=np.asarray(params["intercept"], dtype=np.float64),
+    )
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "features": FEATURES,
+        "numeric_features": NUMERIC_FEATURES,
+        "n_locations": len(params["locations"]),
+        "payload": os.path.basename(payload_path),
+        "sha256": _sha256(payload_path),
+        **(metadata or {}),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+    return header
+
+
+def export_artifact(model, path=ARTIFACT_PATH):
+    import sklearn
+    return save_artifact(pipeline_params(model), path, {"sklearn_version": sklearn.__version__})
+
+
+def read_artifact(path=ARTIFACT_PATH):
+    """(header, params) after checking the format, version and checksum; any
+    malformed header or payload raises ArtifactError (a missing file stays
+    FileNotFoundError)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ArtifactError(f"{path}: malformed header ({e})") from e
+    if not isinstance(header, dict) or header.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"{path}: not a {ARTIFACT_FORMAT} artifact")
+    if header.get("version") != ARTIFACT_VERSION:
+        raise ArtifactError(f"{path}: unsupported artifact version {header.get('version')}")
+    if header.get("features") != FEATURES:
+        raise ArtifactError(f"{path}: unexpected features {header.get('features')}")
+    try:
+        payload_path = os.path.join(os.path.dirname(path), header["payload"])
+        checksum, n_locations = header["sha256"], int(header["n_locations"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ArtifactError(f"{path}: malformed header ({type(e).__name__}: {e})") from e
+
+    if _sha256(payload_path) != checksum:
+        raise ArtifactError(f"{payload_path}: checksum mismatch")
+    try:
+        with np.load(payload_path, allow_pickle=False) as payload:
+            params = {key: payload[key] for key in ("locations", "mean", "scale", "coef", "intercept")}
+    except (KeyError, ValueError, OSError, zipfile.BadZipFile) as e:
+        raise ArtifactError(f"{payload_path}: unreadable payload ({type(e).__name__}: {e})") from e
+    if len(params["coef"]) != n_locations + len(NUMERIC_FEATURES):
+        raise ArtifactError(f"{payload_path}: coefficient count does not match the header")
+    return header, params
+
+
+@timed("model.load_artifact")
+def load_artifact(path=ARTIFACT_PATH):
+    """NumPy-only predictor rebuilt from the artifact"""
+    header, params = read_artifact(path)
+    scorer = FastScorer.from_params(
+        params["locations"].tolist(), params["mean"], params["scale"], params["coef"], params["intercept"]
+    )
+    scorer.version = params_hash(params)
+    return scorer
+
+
+def _scorer_from_pickle(path):
+    model = load_model(path)
+    scorer = FastScorer.from_pipeline(model)
+    scorer.version = params_hash(pipeline_params(model))
+    return scorer
+
+
+def load_scorer(path=None):
+    """Scorer from the artifact when available, else compiled from the pickle.
+
+    ``path`` may point at either file; by default the artifact is preferred.
+    """
+    if path is not None:
+        if path.endswith(".pkl"):
+            return _scorer_from_pickle(path)
+        return load_artifact(path)
+    try:
+        return load_artifact(ARTIFACT_PATH)
+    except (FileNotFoundError, ArtifactError):
+        return _scorer_from_pickle(MODEL_PATH)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        sys.exit("usage: python model_artifact.py export [models/house_prediction_model.pkl]")
+    source = sys.argv[2] if len(sys.argv) > 2 else MODEL_PATH
+    header = export_artifact(load_model(source))
+    print(f"{ARTIFACT_PATH}: {header['n_locations']} locations, sha256 {header['sha256'][:12]}")
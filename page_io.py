@@ -0,0 +1,117 @@
+"""Concurrent external I/O for a page rerun.
+
+A ``PageIO`` runs independent slow calls (geocoding, Overpass, store writes)
+on one shared, bounded thread pool instead of one after another on the script
+thread. Every call gets a deadline, capped by an overall page budget;
+``as_completed`` yields results in the order they arrive, so the page can
+render each part as soon as it is ready, and yields a ``TimeoutError`` for
+any call that misses its deadline. A call past its deadline is not killed;
+its result is dropped for this rerun, but whatever it caches (geocode and
+POI stores) is there for the next one. Calls chained on it with ``then``
+never start: they fail at once with the parent's error.
+
+    io = PageIO(budget=8)
+    coords = io.submit("geocode", get_lat_lon, loc, deadline=3)
+    io.then("pois", coords, lambda c: get_pois(*c), deadline=5)
+    for name, result in io.as_completed():
+        ...  # result is the return value or the exception raised
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, InvalidStateError, ThreadPoolExecutor, wait
+
+from instrumentation import ERRORS, count
+
+MAX_WORKERS = 8
+PAGE_BUDGET = 8.0
+DEFAULT_DEADLINE = 5.0
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="page_io")
+
+
+class PageIO:
+    def __init__(self, budget=PAGE_BUDGET, pool=None):
+        self.pool = pool or _pool
+        self.budget_end = time.monotonic() + budget
+        self._futures = {}
+        self._deadlines = {}
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _deadline(self, deadline):
+        return min(time.monotonic() + deadline, self.budget_end)
+
+    def submit(self, name, fn, *args, deadline=DEFAULT_DEADLINE, **kwargs):
+        """Start fn(*args, **kwargs) now; its deadline counts from now"""
+        with self._lock:
+            self._deadlines[name] = self._deadline(deadline)
+            future = self._futures[name] = self.pool.submit(fn, *args, **kwargs)
+        return future
+
+    def then(self, name, parent, fn, deadline=DEFAULT_DEADLINE):
+        """Start fn(parent's result) once ``parent`` succeeds, without holding a
+        worker while waiting; its deadline counts from then. Fails with the
+        parent's exception if the parent fails or misses its deadline."""
+        future = Future()
+        with self._lock:
+            self._futures[name] = future
+            self._deadlines[name] = self.budget_end
+            self._children.setdefault(parent, []).append(future)
+
+        def start(done):
+            with self._lock:
+                if future.done():  # abandoned: the parent missed its deadline
+                    return
+                if done.exception() is not None:
+                    future.set_exception(done.exception())
+                    return
+                self._deadlines[name] = self._deadline(deadline)
+            inner = self.pool.submit(fn, done.result())
+            inner.add_done_callback(lambda f: _copy_result(f, future))
+
+        parent.add_done_callback(start)
+        return future
+
+    def _abandon(self, parent, error):
+        """Fail every call chained on ``parent`` (and theirs) with ``error``"""
+        with self._lock:
+            children = self._children.pop(parent, [])
+            for child in children:
+                if not child.done():
+                    child.set_exception(error)
+        for child in children:
+            self._abandon(child, error)
+
+    def as_completed(self):
+        """(name, result or exception) for every call, fastest first; calls past
+        their deadline come out as TimeoutError"""
+        with self._lock:
+            pending = dict(self._futures)
+        by_future = {future: name for name, future in pending.items()}
+        while by_future:
+            with self._lock:
+                next_deadline = min(self._deadlines[name] for name in by_future.values())
+            done, _ = wait(by_future, timeout=max(next_deadline - time.monotonic(), 0),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                name = by_future.pop(future)
+                yield name, future.exception() or future.result()
+            now = time.monotonic()
+            with self._lock:
+                expired = [f for f, name in by_future.items() if self._deadlines[name] <= now]
+            for future in expired:
+                name = by_future.pop(future)
+                count(ERRORS, f"page_io.{name}.timeout")
+                error = TimeoutError(f"{name} did not finish in time")
+                self._abandon(future, error)
+                yield name, error
+
+
+def _copy_result(source, target):
+    try:
+        if source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+    except InvalidStateError:  # abandoned while running
+        pass
@@ -1,12 +1,22 @@
+import instrumentation
+instrumentation.page_start("predict")
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
-from utils import model, data, calculate_emi, get_recommendations, get_lat_lon
+from utils import calculate_emi, predict_price, get_lat_lon, get_location_index
 from utils import show_navigation
-import requests
+from poi import get_pois
 from utils import login_form
 from utils import save_prediction
 from utils import save_property_for_user
+from utils import get_scorer, get_price_intervals
+from whatif import sweep
+from page_io import PageIO
+import plotly.express as px
+
+# Seconds each external call may take before the page renders without it
+GEOCODE_DEADLINE = 3.0
+POI_DEADLINE = 5.0
 
 
 hide_pages_style = """
@@ -29,6 +39,7 @@ if "username" not in st.session_state:
 # Show login if not logged in
 if not st.session_state["logged_in"]:
     login_form()
+    instrumentation.page_end()
     st.stop()  # stops execution until user logs in
 st.sidebar.markdown("---")
 st.sidebar.caption("Made with ❤️ using Streamlit")
@@ -44,50 +55,27 @@ if "recommendations" not in st.session_state:
 if "saved_properties" not in st.session_state:
     st.session_state["saved_properties"] = []
 
-def get_pois(lat, lon, radius=1500, poi_types=["school", "hospital", "subway_entrance"]):
-    """Fetch nearby POIs from OpenStreetMap via Overpass API."""
-    pois = []
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    
-    for poi in poi_types:
-        query = f"""
-        [out:json];
-        node
-          ["amenity"="{poi}"]
-          (around:{radius},{lat},{lon});
-        out;
-        """
-        response = requests.get(overpass_url, params={"data": query})
-        data = response.json()
-        for element in data.get("elements", []):
-            name = element.get("tags", {}).get("name", poi.title())
-            pois.append({"lat": element["lat"], "lon": element["lon"], "name": name, "type": poi})
-    
-    return pois
-
-
 st.header("🔮 Predict House Price")
 
 # Sidebar Inputs
-loc = st.selectbox("📍 Location", sorted(data["location"].unique()))
+location_index = get_location_index()
+query = st.text_input("🔎 Search location", placeholder="e.g. Whitefeild, hsr layout")
+matches = [name for name, _ in location_index.search(query)] if query else []
+if query and not matches:
+    st.caption(f"No close match for '{query}'; showing all locations")
+loc = st.selectbox("📍 Location", matches or location_index.choices)
 sqft = st.number_input("Total Sqft", min_value=200, max_value=10000, step=50)
 beds = st.number_input("Bedrooms", min_value=1, max_value=10, step=1)
 bath = st.number_input("Bathrooms", min_value=1, max_value=10, step=1)
 balc = st.number_input("Balconies", min_value=0, max_value=5, step=1)
 
 # Prediction
-input_df = pd.DataFrame(
-    [[loc, sqft, bath, balc, beds]],
-    columns=["location", "total_sqft", "bath", "balcony", "bedrooms"],
-)
-
 if st.button("🔮 Predict Price"):
-    output = model.predict(input_df)
-    predicted_price = output[0] * 100000
-    lower, upper = round(predicted_price*0.9, 2), round(predicted_price*1.1, 2)
+    predicted_price, (lower, upper), recommendations = predict_price(loc, sqft, bath, balc, beds)
+    lower, upper = round(lower, 2), round(upper, 2)
     st.session_state["predicted_price"] = round(predicted_price, 2)
     st.session_state["price_range"] = (lower, upper)
-    st.session_state["recommendations"] = get_recommendations(loc, sqft, beds, predicted_price)
+    st.session_state["recommendations"] = recommendations
 
 if st.session_state["predicted_price"]:
     price = st.session_state["predicted_price"]
@@ -114,6 +102,42 @@ if st.session_state["predicted_price"]:
         )
         st.success("Property saved ✅")
 
+    # What-if: the whole grid is scored in one batched prediction
+    with st.expander("📈 What-if: price across sizes and bedrooms"):
+        compare_locs = st.multiselect("Locations", location_index.choices, default=[loc], max_selections=5)
+        sqft_range = st.slider("Sqft range", 200, 10000, (500, 3000), step=50)
+        bed_range = st.slider("Bedrooms range", 1, 10, (1, 5))
+        tie_bath = st.checkbox("Bathrooms = bedrooms", value=True)
+
+        if compare_locs:
+            with instrumentation.span("predict.whatif"):
+                result = sweep(
+                    get_scorer(), compare_locs,
+                    sqft=range(sqft_range[0], sqft_range[1] + 1, 50),
+                    bedrooms=range(bed_range[0], bed_range[1] + 1),
+                    bath="bedrooms" if tie_bath else bath,
+                    balcony=balc,
+                    intervals=get_price_intervals(),
+                )
+                grid = result.to_frame()
+
+            fig = px.line(
+                grid, x="total_sqft", y="price", color="bedrooms", line_dash="location",
+                hover_data=[col for col in ("price_low", "price_high") if col in grid],
+                labels={"total_sqft": "Total Sqft", "price": "Price (lakhs)"},
+                title="Predicted price by size and bedrooms",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            heat_loc = st.selectbox("Heatmap location", compare_locs)
+            table = result.curves(heat_loc)
+            fig = px.imshow(
+                table.T, aspect="auto", origin="lower", color_continuous_scale="Viridis",
+                labels={"x": "Total Sqft", "y": "Bedrooms", "color": "Price (lakhs)"},
+                title=f"Price heatmap: {heat_loc}",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
     # lat, lon = get_lat_lon(loc)
     # if lat and lon:
     #     st.subheader("📍 Location on Map")
@@ -138,55 +162,14 @@ if st.session_state["predicted_price"]:
     #     ))
 
 
-def get_pois(lat, lon, radius=1500, poi_types=["school", "hospital", "subway_entrance"]):
-    """Fetch nearby POIs from OpenStreetMap via Overpass API."""
-    pois = []
-    overpass_url = "https://overpass-api.de/api/interpreter"  # ✅ use https
-
-    for poi in poi_types:
-        query = f"""
-        [out:json];
-        node
-          ["amenity"="{poi}"]
-          (around:{radius},{lat},{lon});
-        out;
-        """
-        try:
-            response = requests.get(overpass_url, params={"data": query}, timeout=15)
-            data = response.json()
-            for element in data.get("elements", []):
-                name = element.get("tags", {}).get("name", poi.title())
-                pois.append({
-                    "lat": float(element["lat"]),
-                    "lon": float(element["lon"]),
-                    "name": name,
-                    "type": poi
-                })
-        except Exception as e:
-            st.warning(f"⚠️ Could not fetch {poi}: {e}")
-    return pois
-
-
-lat, lon = get_lat_lon(loc)
-if lat and lon:
-    st.subheader("📍 Property Location & Nearby POIs")
-
-    # Property marker
+def build_map(lat, lon, pois=()):
+    """Property marker plus any POIs"""
     property_df = pd.DataFrame([{"lat": lat, "lon": lon, "name": "Property", "type": "Property"}])
-
-    # Fetch nearby POIs
-    poi_df = pd.DataFrame(get_pois(lat, lon))
-
-    # Combine property and POIs
-    map_df = pd.concat([property_df, poi_df], ignore_index=True)
-
-    # Add color column
+    map_df = pd.concat([property_df, pd.DataFrame(list(pois))], ignore_index=True)
     map_df["color"] = map_df["type"].apply(
         lambda x: [255, 0, 0, 200] if x == "Property" else [0, 128, 255, 160]
     )
-
-    # Render map
-    st.pydeck_chart(pdk.Deck(
+    return pdk.Deck(
         # ✅ Try CARTO dark basemap, fallback to default if blocked
         map_style="https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json",
         initial_view_state=pdk.ViewState(
@@ -205,6 +188,40 @@ if lat and lon:
             )
         ],
         tooltip={"html": "<b>{name}</b><br>Type: {type}", "style": {"color": "white"}}
-    ))
-else:
-    st.error("❌ Could not fetch location coordinates")
+    )
+
+
+# External calls run concurrently: the geocode starts now and the POI lookups as
+# soon as the coordinates are known; the map fills in as each one arrives
+io = PageIO()
+coords = io.submit("geocode", get_lat_lon, loc, timeout=GEOCODE_DEADLINE, deadline=GEOCODE_DEADLINE)
+io.then(
+    "pois", coords,
+    lambda c: get_pois(*c, timeout=POI_DEADLINE) if c[0] else ([], {}),
+    deadline=POI_DEADLINE,
+)
+
+st.subheader("📍 Property Location & Nearby POIs")
+status = st.empty()
+status.caption("Locating property…")
+map_slot = st.empty()
+lat = lon = None
+for name, result in io.as_completed():
+    if name == "geocode":
+        if isinstance(result, Exception) or not result[0]:
+            map_slot.error("❌ Could not fetch location coordinates")
+            continue
+        lat, lon = result
+        map_slot.pydeck_chart(build_map(lat, lon))
+        status.caption("Loading nearby POIs…")
+    elif name == "pois" and lat is not None:
+        if isinstance(result, Exception):
+            st.warning(f"⚠️ Nearby POIs unavailable: {result}")
+            continue
+        pois, poi_errors = result
+        for poi_type, e in poi_errors.items():
+            st.warning(f"⚠️ Could not fetch {poi_type}: {e}")
+        map_slot.pydeck_chart(build_map(lat, lon, pois))
+status.empty()
+
+instrumentation.page_end()
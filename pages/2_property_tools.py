@@ -1,3 +1,5 @@
+import instrumentation
+instrumentation.page_start("property_tools")
 import streamlit as st
 from utils import calculate_emi
 from utils import show_navigation
@@ -23,6 +25,7 @@ if "username" not in st.session_state:
 # Show login if not logged in
 if not st.session_state["logged_in"]:
     login_form()
+    instrumentation.page_end()
     st.stop()  # stops execution until user logs in
 
 st.sidebar.markdown("---")
@@ -95,4 +98,6 @@ if predicted_price:
             st.error("❌ This property may be too expensive for your income.")
 
 else:
-    st.info("No predicted price found. Please run the Predict Price page first.")
\ No newline at end of file
+    st.info("No predicted price found. Please run the Predict Price page first.")
+
+instrumentation.page_end()
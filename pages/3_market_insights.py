@@ -1,9 +1,14 @@
+import instrumentation
+instrumentation.page_start("market_insights")
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
-from utils import data
+import pandas as pd
+import numpy as np
 from utils import show_navigation
+from insights import DATA_PATH, file_hash, load_aggregates
 import plotly.express as px
+import plotly.graph_objects as go
 
 hide_pages_style = """
     <style>
@@ -27,6 +32,7 @@ if "username" not in st.session_state:
 # Show login if not logged in
 if not st.session_state["logged_in"]:
     login_form()
+    instrumentation.page_end()
     st.stop()  # stops execution until user logs in
 
 st.sidebar.markdown("---")
@@ -35,26 +41,54 @@ st.sidebar.caption("Made with ❤️ using Streamlit")
 st.set_page_config(page_title="Bangalore Housing Insights", layout="wide")
 st.header("📊 Bangalore Housing Market Insights")
 
+@st.cache_data
+def cached_aggregates(data_hash):
+    # Keyed on the data file's content hash, so every session shares one copy
+    return load_aggregates(DATA_PATH)
+
+aggregates = cached_aggregates(file_hash(DATA_PATH))
+
 col1, col2 = st.columns(2)
 
-with col1:
-    st.subheader("Price vs Sqft (sample)")
-    fig = px.scatter(
-        data.sample(500),
-        x="total_sqft",
-        y="price_per_sqft",
-        color="location",
-        title="Price per Sqft vs Area",
-        opacity=0.6,
-    )
+with col1, instrumentation.span("insights.scatter"):
+    # Binned server-side: the chart gets at most a few thousand cells, however many listings there are
+    st.subheader("Price per Sqft vs Area")
+    bins = aggregates["scatter_bins"]
+    x_edges, y_edges = np.array(bins["x_edges"]), np.array(bins["y_edges"])
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    colour_by = st.radio("Colour by", ["Density", "Top locations"], horizontal=True)
+    if colour_by == "Density":
+        counts = np.array(bins["count"], dtype=float)
+        counts[counts == 0] = np.nan
+        fig = go.Figure(go.Heatmap(
+            x=x_centers, y=y_centers, z=counts.T,
+            colorscale="Viridis", colorbar={"title": "listings"},
+            hovertemplate="sqft %{x:.0f}<br>price/sqft %{y:.0f}<br>%{z} listings<extra></extra>",
+        ))
+    else:
+        largest = max(max(g["count"], default=0) for g in bins["top_locations"]) or 1
+        fig = go.Figure([
+            go.Scatter(
+                x=x_centers[g["ix"]], y=y_centers[g["iy"]], mode="markers", name=g["location"],
+                marker={"size": 4 + 20 * np.sqrt(np.array(g["count"]) / largest), "opacity": 0.6},
+                customdata=g["count"],
+                hovertemplate="sqft %{x:.0f}<br>price/sqft %{y:.0f}<br>%{customdata} listings",
+            )
+            for g in bins["top_locations"]
+        ])
+    fig.update_layout(title="Price per Sqft vs Area", xaxis_title="total_sqft", yaxis_title="price_per_sqft")
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{aggregates['rows']:,} listings in {len(x_centers)}×{len(y_centers)} bins; "
+               f"{bins['outside']:,} outside the 0.5–99.5 percentile range not shown")
 
 with col2:
     st.subheader("Bedroom Distribution")
-    fig = px.histogram(
-        data,
-        x="bedrooms",
-        nbins=20,
+    bedroom_hist = aggregates["bedroom_hist"]
+    fig = px.bar(
+        x=bedroom_hist["bedrooms"],
+        y=bedroom_hist["count"],
+        labels={"x": "bedrooms", "y": "count"},
         title="Bedroom Count Distribution",
         color_discrete_sequence=["indianred"],
     )
@@ -64,9 +98,12 @@ with st.expander("View Bangalore Housing Market Trends"):
 
     # 1️⃣ Average Price per Sqft by Location
     st.subheader("🏘️ Average Price per Sqft by Location")
-    avg_price_per_location = data.groupby("location")["price_per_sqft"].mean().sort_values(ascending=False)
+    avg_price_per_location = pd.DataFrame({
+        "location": aggregates["locations"]["location"],
+        "price_per_sqft": aggregates["locations"]["avg_price_per_sqft"],
+    })
     fig1 = px.bar(
-        avg_price_per_location.head(10).reset_index(),
+        avg_price_per_location.head(10),
         x="location",
         y="price_per_sqft",
         color="price_per_sqft",
@@ -76,30 +113,36 @@ with st.expander("View Bangalore Housing Market Trends"):
 
     # 2️⃣ Price Distribution
     st.subheader("💰 House Price Distribution")
-    fig2 = px.histogram(
-        data,
-        x="price",
-        nbins=50,
+    price_hist = aggregates["price_hist"]
+    edges = price_hist["edges"]
+    fig2 = px.bar(
+        x=[(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+        y=price_hist["count"],
+        labels={"x": "price", "y": "count"},
         title="Distribution of House Prices in Bangalore",
         color_discrete_sequence=["indianred"]
     )
+    fig2.update_traces(width=edges[1] - edges[0])
     st.plotly_chart(fig2, use_container_width=True)
 
     # 3️⃣ Bedroom vs Price
     st.subheader("🛏️ Bedrooms vs Price")
-    fig3 = px.box(
-        data,
-        x="bedrooms",
-        y="price",
-        color="bedrooms",
-        title="Price vs Number of Bedrooms",
-        points="all"
-    )
+    # Boxes drawn from precomputed quantiles instead of shipping every listing
+    fig3 = go.Figure([
+        go.Box(
+            name=bedrooms, x=[bedrooms],
+            q1=[b["q1"]], median=[b["median"]], q3=[b["q3"]],
+            lowerfence=[b["lowerfence"]], upperfence=[b["upperfence"]], mean=[b["mean"]],
+        )
+        for bedrooms, b in aggregates["price_by_bedrooms"].items()
+    ])
+    fig3.update_layout(title="Price vs Number of Bedrooms", xaxis_title="bedrooms", yaxis_title="price")
     st.plotly_chart(fig3, use_container_width=True)
 
     # 4️⃣ Correlation Heatmap (optional)
     st.subheader("📈 Feature Correlation with Price")
-    corr = data[["price","total_sqft","bath","balcony","bedrooms","price_per_sqft"]].corr()
+    corr_columns = aggregates["corr"]["columns"]
+    corr = pd.DataFrame(aggregates["corr"]["values"], index=corr_columns, columns=corr_columns)
     fig4 = px.imshow(
         corr,
         text_auto=True,
@@ -108,3 +151,5 @@ with st.expander("View Bangalore Housing Market Trends"):
     st.plotly_chart(fig4, use_container_width=True)
 
 st.success("✅ Insights generated from Cleaned Bangalore Housing Data")
+
+instrumentation.page_end()
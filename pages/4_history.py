@@ -65,10 +65,10 @@
 
 
 
+import instrumentation
+instrumentation.page_start("history")
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from utils import show_navigation, login_form
 from utils import load_predictions
 from utils import load_history, clear_user_history
@@ -97,6 +97,7 @@ if "username" not in st.session_state:
 
 if not st.session_state["logged_in"]:
     login_form()
+    instrumentation.page_end()
     st.stop()
 
 # --------------------------
@@ -124,6 +125,9 @@ if not history_df.empty:
     if st.button("🗑 Clear My History"):
         clear_user_history(user)
         st.success("Your history was cleared ✅")
+        instrumentation.page_end()
         st.stop()
 else:
-    st.info("No history available yet. Make predictions to see them here!")
\ No newline at end of file
+    st.info("No history available yet. Make predictions to see them here!")
+
+instrumentation.page_end()
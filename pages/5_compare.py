@@ -1,3 +1,5 @@
+import instrumentation
+instrumentation.page_start("compare")
 import streamlit as st
 import pandas as pd
 from utils import show_navigation
@@ -26,6 +28,7 @@ if "username" not in st.session_state:
 # Show login if not logged in
 if not st.session_state["logged_in"]:
     login_form()
+    instrumentation.page_end()
     st.stop()  # stops execution until user logs in
 
 st.sidebar.markdown("---")
@@ -53,6 +56,9 @@ if saved:
     if st.button("🗑 Clear My Saved Properties"):
         clear_saved_properties(username)
         st.success("Your saved properties were cleared ✅")
+        instrumentation.page_end()
         st.rerun()
 else:
     st.info("No properties saved yet. Go to 🔮 Predict Price and save some!")
+
+instrumentation.page_end()
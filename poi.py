@@ -0,0 +1,157 @@
+"""Nearby points of interest from OpenStreetMap's Overpass API.
+
+All amenity types are queried concurrently over one shared HTTP session. Results
+are cached on disk in poi_cache.json (or ``cache_path``), keyed by a rounded
+(lat, lon, radius, type) tile; the tiles fetched by one get_pois call are
+written together. When offline (POI_OFFLINE=1) or when Overpass fails, the last
+cached snapshot for the tile is served instead.
+
+OVERPASS_URL can point the fetcher at a local stub server.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import atomic_write, env_flag
+from instrumentation import PAYLOAD_BYTES, count, span, timed
+
+OVERPASS_URL = os.environ.get("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+POI_CACHE = "poi_cache.json"
+POI_TYPES = ("school", "hospital", "subway_entrance")
+QUERY_TIMEOUT = 15
+CACHE_TTL = 7 * 24 * 3600
+# ~110 m tiles: nearby properties share cached results
+TILE_DECIMALS = 3
+
+_session = None
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="poi")
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def tile_key(lat, lon, radius, poi_type):
+    return f"{round(lat, TILE_DECIMALS)},{round(lon, TILE_DECIMALS)},{radius},{poi_type}"
+
+
+# ---------------- Disk cache ----------------
+class TileStore:
+    """In-memory copy of one cache file; ``put`` marks it dirty, ``flush`` writes it"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._tiles = json.load(f)
+        except FileNotFoundError:
+            self._tiles = {}
+
+    def get(self, key):
+        with self._lock:
+            return self._tiles.get(key)
+
+    def put(self, key, pois):
+        with self._lock:
+            self._tiles[key] = {"fetched_at": time.time(), "pois": pois}
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(self._tiles, f)
+            self._dirty = False
+
+
+def tile_store(path=POI_CACHE):
+    """The shared TileStore for a cache file, one per path"""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TileStore(path)
+        return _stores[path]
+
+
+# ---------------- Overpass ----------------
+def fetch_pois(lat, lon, radius, poi_type, url=OVERPASS_URL, timeout=QUERY_TIMEOUT):
+    """One Overpass query for a single amenity type"""
+    query = f"""
+    [out:json];
+    node
+      ["amenity"="{poi_type}"]
+      (around:{radius},{lat},{lon});
+    out;
+    """
+    with span("overpass", external=True):
+        response = get_session().get(url, params={"data": query}, timeout=timeout)
+        response.raise_for_status()
+    count(PAYLOAD_BYTES, "overpass", len(response.content))
+    pois = []
+    for element in response.json().get("elements", []):
+        name = element.get("tags", {}).get("name", poi_type.title())
+        pois.append({
+            "lat": float(element["lat"]),
+            "lon": float(element["lon"]),
+            "name": name,
+            "type": poi_type
+        })
+    return pois
+
+
+def _tile_pois(lat, lon, radius, poi_type, offline, url, timeout, store):
+    key = tile_key(lat, lon, radius, poi_type)
+    cached = store.get(key)
+    if cached and (offline or time.time() - cached["fetched_at"] < CACHE_TTL):
+        return cached["pois"]
+    if offline:
+        raise LookupError(f"no cached {poi_type} data for this area")
+    try:
+        pois = fetch_pois(
+            round(lat, TILE_DECIMALS), round(lon, TILE_DECIMALS), radius, poi_type, url, timeout
+        )
+    except Exception:
+        if cached:
+            # Stale snapshot beats nothing
+            return cached["pois"]
+        raise
+    store.put(key, pois)
+    return pois
+
+
+@timed()
+def get_pois(lat, lon, radius=1500, poi_types=POI_TYPES, offline=None,
+             url=None, timeout=QUERY_TIMEOUT, cache_path=POI_CACHE):
+    """Fetch nearby POIs for every amenity type concurrently.
+
+    Returns (pois, errors) where errors maps an amenity type to the exception
+    that prevented it from loading.
+    """
+    offline = env_flag("POI_OFFLINE") if offline is None else offline
+    url = url or OVERPASS_URL
+    store = tile_store(cache_path)
+    futures = {
+        poi_type: _pool.submit(_tile_pois, lat, lon, radius, poi_type, offline, url, timeout, store)
+        for poi_type in poi_types
+    }
+    pois, errors = [], {}
+    for poi_type, future in futures.items():
+        try:
+            pois.extend(future.result())
+        except Exception as e:
+            errors[poi_type] = e
+    # One write for every tile fetched above
+    store.flush()
+    return pois, errors
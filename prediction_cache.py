@@ -0,0 +1,141 @@
+"""Process-wide LRU/TTL cache for prediction results.
+
+Keys are normalized input tuples (see ``prediction_key``) and the whole cache is
+tied to a version, e.g. (model version, dataset hash): changing the version
+drops every entry. Values must be JSON-serializable when the cache persists
+itself to disk (PREDICTION_CACHE_PATH); the file is written atomically at
+most every ``save_interval`` seconds and at exit, and entries from another
+version or past their TTL are skipped when it is loaded again.
+"""
+import atexit
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from common import atomic_write
+from instrumentation import count
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 24 * 3600
+SAVE_INTERVAL = 30
+FORMAT_VERSION = 1
+
+
+def prediction_key(location, sqft, bath, balcony, bedrooms):
+    """Same inputs -> same key, whatever widget types they came from (1200 == 1200.0)"""
+    return (str(location).strip(), round(float(sqft), 6), int(bath), int(balcony), int(bedrooms))
+
+
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, path=None, save_interval=SAVE_INTERVAL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    # ---------------- Lookups ----------------
+    def set_version(self, version):
+        """Drop every entry when the model/data version changes"""
+        version = list(version) if isinstance(version, tuple) else version
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+                self._dirty = True
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                count("cache", "prediction.miss")
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            count("cache", "prediction.hit")
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+        if self.path and time.monotonic() - self._last_save > self.save_interval:
+            self.save()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    # ---------------- Persistence ----------------
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if saved.get("format") != FORMAT_VERSION:
+            return
+        now = time.time()
+        self.version = saved["version"]
+        for key, expires_at, value in saved["entries"][-self.maxsize:]:
+            if expires_at > now:
+                self._entries[tuple(key)] = (expires_at, value)
+
+    def save(self):
+        """Write the cache to ``path`` if anything changed since the last save"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {
+                "format": FORMAT_VERSION,
+                "version": self.version,
+                # Oldest first, so reloading keeps the LRU order
+                "entries": [[list(key), expires_at, value] for key, (expires_at, value) in self._entries.items()],
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+        with atomic_write(self.path) as f:
+            json.dump(snapshot, f)
+
+
+_MISSING = object()
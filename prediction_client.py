@@ -0,0 +1,83 @@
+"""Client for prediction_service.py.
+
+Every call returns None when the service cannot answer (not running, timed
+out, error status); the caller then computes the result in-process. After a
+failure the service is not tried again for ``retry_after`` seconds, so a dead
+service costs one timeout, not one per request. Connections are kept alive,
+one per thread.
+"""
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from instrumentation import ERRORS, count, span
+
+DEFAULT_TIMEOUT = 0.5
+RETRY_AFTER = 30
+
+
+class PredictionClient:
+    def __init__(self, url, timeout=DEFAULT_TIMEOUT, retry_after=RETRY_AFTER):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self):
+        """(connection, whether it has served requests before)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn, True
+        conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn, False
+
+    def _request(self, method, path, payload=None):
+        if time.monotonic() < self._down_until:
+            return None
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        while True:
+            conn, reused = self._connection()
+            try:
+                with span(f"prediction_service{path}", external=True):
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(f"{path}: HTTP {response.status} {data[:200]!r}")
+                return json.loads(data)
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                conn.close()
+                self._local.conn = None
+                # A kept-alive connection the server has since closed: retry once on a fresh one
+                if reused and isinstance(e, (ConnectionError, http.client.RemoteDisconnected)):
+                    continue
+                count(ERRORS, "prediction_service")
+                self._down_until = time.monotonic() + self.retry_after
+                return None
+
+    # ---------------- Endpoints ----------------
+    def health(self):
+        return self._request("GET", "/health")
+
+    def predict(self, location, total_sqft, bath, balcony, bedrooms):
+        """{"location", "price", "low", "high"} in lakhs, or None"""
+        return self._request("POST", "/predict", {
+            "location": location, "total_sqft": total_sqft, "bath": bath,
+            "balcony": balcony, "bedrooms": bedrooms,
+        })
+
+    def recommend(self, location, sqft, bedrooms, price, top_n=5):
+        """Recommendations DataFrame, or None"""
+        result = self._request("POST", "/recommend", {
+            "location": location, "sqft": sqft, "bedrooms": bedrooms, "price": price, "top_n": top_n,
+        })
+        return None if result is None else pd.DataFrame(**result["recommendations"])
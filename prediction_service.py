@@ -0,0 +1,339 @@
+"""Local prediction service: one model copy shared by every app worker.
+
+A small asyncio HTTP/1.1 server (standard library only, keep-alive, JSON).
+Concurrent /predict requests arriving within ``window`` seconds of each other
+are scored as one vectorized batch; /recommend requests are coalesced the same
+way, de-duplicated and answered from the shared recommendation index off the
+event loop.
+
+    POST /predict    {"location", "total_sqft", "bath", "balcony", "bedrooms"}
+                     -> {"location", "price", "low", "high"}  (lakhs; location as matched)
+    POST /recommend  {"location", "sqft", "bedrooms", "price", "top_n"? (1..50)}
+                     -> {"recommendations": {"index", "columns", "data"}}
+    GET  /health     -> model / data versions and uptime
+    GET  /metrics    -> request counts, p50/p95/p99 latency and batch sizes
+
+Run with:
+    python prediction_service.py [--port 8765] [--window-ms 1] [--max-batch 256]
+prediction_client.PredictionClient talks to it (PREDICTION_SERVICE_URL).
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from calibration import load_intervals
+from dataset import load_data
+from location_index import OTHER, load_location_index
+from model_artifact import ArtifactError, load_scorer
+from recommender import GeoRecommendationIndex, RecommendationIndex, coordinates_stamp, load_coordinates
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW = 0.001
+DEFAULT_MAX_BATCH = 256
+MAX_BODY = 1 << 20
+LATENCY_WINDOW = 10_000
+MAX_TOP_N = 50
+ROUTES = ("/predict", "/recommend", "/health", "/metrics")
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Collects submitted items for up to ``window`` seconds (or ``max_batch`` items)
+    and hands them to ``fn(items) -> results`` in one call. ``fn`` runs on the
+    event loop unless ``in_executor`` is set."""
+
+    def __init__(self, fn, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, in_executor=False):
+        self.fn = fn
+        self.window = window
+        self.max_batch = max_batch
+        self.in_executor = in_executor
+        self.batches = 0
+        self.sizes = deque(maxlen=LATENCY_WINDOW)
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            self.sizes.append(len(batch))
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            if self.in_executor:
+                results = await asyncio.get_running_loop().run_in_executor(None, self.fn, items)
+            else:
+                results = self.fn(items)
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# ---------------- Request parsing ----------------
+def _number(payload, key, kind=float):
+    try:
+        value = kind(payload[key])
+    except KeyError:
+        raise RequestError(400, f"missing field: {key}") from None
+    except (TypeError, ValueError, OverflowError):
+        raise RequestError(400, f"{key} must be a number") from None
+    # "nan" / "inf" parse as floats but would make the response invalid JSON
+    if not math.isfinite(value):
+        raise RequestError(400, f"{key} must be a finite number")
+    return value
+
+
+def content_length(headers):
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "invalid Content-Length") from None
+    if length < 0:
+        raise RequestError(400, "invalid Content-Length")
+    return length
+
+
+def parse_predict(payload):
+    if not isinstance(payload, dict) or not isinstance(payload.get("location"), str):
+        raise RequestError(400, "location must be a string")
+    return (payload["location"], _number(payload, "total_sqft"), _number(payload, "bath"),
+            _number(payload, "balcony"), _number(payload, "bedrooms", int))
+
+
+def parse_recommend(payload):
+    if not isinstance(payload, dict) or not isinstance(payload.get("location"), str):
+        raise RequestError(400, "location must be a string")
+    sqft = _number(payload, "sqft")
+    if not sqft > 0:
+        # Recommendations rank on price / sqft
+        raise RequestError(400, "sqft must be positive")
+    top_n = _number(payload, "top_n", int) if "top_n" in payload else 5
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise RequestError(400, f"top_n must be between 1 and {MAX_TOP_N}")
+    return payload["location"], sqft, _number(payload, "bedrooms", int), _number(payload, "price"), top_n
+
+
+class PredictionService:
+    def __init__(self, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.scorer = load_scorer()
+        self.data = load_data()
+        self.city_recommendations = RecommendationIndex(self.data)
+        self.coordinates_stamp = None
+        self.recommendations = None
+        self._refresh_recommendations()
+        self.locations = load_location_index(self.scorer.locations)
+        try:
+            self.intervals = load_intervals(self.scorer.locations, model_version=self.scorer.version)
+        except ArtifactError:
+            self.intervals = None
+        self.started = time.time()
+        self.batchers = {
+            "/predict": MicroBatcher(self.predict_batch, window, max_batch),
+            "/recommend": MicroBatcher(self.recommend_batch, window, max_batch, in_executor=True),
+        }
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def _refresh_recommendations(self):
+        """Rebuild the geo index when the coordinates table or geocode store changed"""
+        stamp = coordinates_stamp()
+        if stamp != self.coordinates_stamp:
+            self.recommendations = GeoRecommendationIndex(
+                self.data, load_coordinates(), fallback=self.city_recommendations
+            )
+            self.coordinates_stamp = stamp
+
+    # ---------------- Batch handlers ----------------
+    def predict_batch(self, items):
+        locations = [self.locations.match(item[0]) for item in items]
+        columns = list(zip(*items))
+        prices = self.scorer.predict_arrays(locations, columns[1], columns[2], columns[3], columns[4])
+        if self.intervals is not None:
+            low, high = self.intervals.intervals(locations, np.asarray(columns[4]), prices)
+        else:
+            low, high = prices * 0.9, prices * 1.1
+        return [
+            {"location": loc, "price": float(p), "low": float(lo), "high": float(hi)}
+            for loc, p, lo, hi in zip(locations, prices, low, high)
+        ]
+
+    def _match_recommend(self, item):
+        # Same location matching as /predict, so a typo still excludes the listing's
+        # own location; a name that matches nothing is passed through as typed
+        location = self.locations.match(item[0])
+        return (location if location != OTHER else item[0],) + item[1:]
+
+    def recommend_batch(self, items):
+        self._refresh_recommendations()
+        items = [self._match_recommend(item) for item in items]
+        answers = {}
+        for item in dict.fromkeys(items):
+            recs = self.recommendations.query(*item)
+            answers[item] = {"recommendations": recs.to_dict(orient="split")}
+        return [answers[item] for item in items]
+
+    # ---------------- Endpoints ----------------
+    def health(self):
+        return {
+            "status": "ok",
+            "model_version": self.scorer.version,
+            "data_hash": self.data.attrs.get("source_hash"),
+            "intervals": self.intervals is not None,
+            "uptime_seconds": time.time() - self.started,
+        }
+
+    def metrics(self):
+        endpoints = {}
+        for path, samples in self.latencies.items():
+            ms = np.asarray(samples) * 1000
+            endpoints[path] = {
+                "count": self.counts[path],
+                "errors": self.errors[path],
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+            }
+        batches = {
+            path: {"batches": b.batches, "mean_size": float(np.mean(b.sizes)) if b.sizes else 0.0,
+                   "max_size": max(b.sizes, default=0)}
+            for path, b in self.batchers.items()
+        }
+        return {"endpoints": endpoints, "batches": batches}
+
+    async def dispatch(self, method, path, body):
+        if path == "/health":
+            return self.health()
+        if path == "/metrics":
+            return self.metrics()
+        if path not in self.batchers:
+            raise RequestError(404, f"no such endpoint: {path}")
+        if method != "POST":
+            raise RequestError(405, f"{path} expects POST")
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON") from None
+        parse = parse_predict if path == "/predict" else parse_recommend
+        try:
+            return await self.batchers[path].submit(parse(payload))
+        except ValueError as e:
+            raise RequestError(400, str(e)) from None
+
+    # ---------------- HTTP ----------------
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                path = target.split("?", 1)[0]
+
+                # Only a connection whose body was read can carry another request
+                framed = False
+                try:
+                    length = content_length(headers)
+                    if length > MAX_BODY:
+                        raise RequestError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    framed = True
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                keep_alive = (framed and version == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                route = path if path in ROUTES else "other"
+                self.counts[route] += 1
+                if status != 200:
+                    self.errors[route] += 1
+                self.latencies[route].append(time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching prediction service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW * 1000,
+                        help="How long to wait for more requests to join a batch")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    service = PredictionService(args.window_ms / 1000, args.max_batch)
+    print(f"Serving on http://{args.host}:{args.port} (model {service.scorer.version[:12]})", flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""Similar-property recommendations.
+
+RecommendationIndex matches listings city-wide on bedrooms (+/-1) and size
+(+/-200 sqft), closest in price per sqft. GeoRecommendationIndex adds a
+distance constraint: only listings in locations within ``radius_km`` of the
+query location, using the shipped location_coordinates.csv table (refined by
+the geocode store where it has an entry), topped up city-wide when fewer than
+``top_n`` nearby listings match. Both exclude the query's own location and
+return the same columns.
+
+Batch mode, for a CSV of query properties (location, total_sqft, bedrooms,
+price in lakhs):
+    python recommender.py nearby queries.csv [-o out.csv] [--radius 5] [--top 5]
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset import csv_dtype
+from geocode import COORDINATES_TABLE, GEOCODE_CACHE, GeocodeCache, load_coordinate_table
+
+RECOMMENDATION_COLUMNS = ["location", "total_sqft", "bedrooms", "price"]
+BEDROOM_WINDOW = 1
+SQFT_WINDOW = 200
+DEFAULT_RADIUS_KM = 5.0
+# query_many ranks at most this many query x listing pairs at a time
+BATCH_CELLS = 1 << 22
+EARTH_RADIUS_KM = 6371.0
+# The training bucket for rare locations is not one place
+UNLOCATED = {"other"}
+# Windows up to this size are scanned directly; bigger ones are searched outward
+# from the target price per sqft
+SCAN_LIMIT = 4096
+
+
+class RecommendationIndex:
+    """Prebuilt index for get_recommendations.
+
+    Listings are grouped by bedrooms and kept in two orders: by total_sqft, so the
+    +/-200 sqft window is found by binary search, and by price_per_sqft, so that
+    large windows can be searched outward from the target instead of scanned.
+    Ties on the price-per-sqft distance are broken by dataset order.
+    """
+
+    def __init__(self, data):
+        codes, self.locations = pd.factorize(data["location"])
+        self.location_codes = {loc: i for i, loc in enumerate(self.locations)}
+        bedrooms = data["bedrooms"].to_numpy()
+        sqft = data["total_sqft"].to_numpy()
+        ppsf = data["price_per_sqft"].to_numpy()
+
+        by_sqft = np.lexsort((sqft, bedrooms))
+        self.bedroom_keys, self.group_start = np.unique(bedrooms[by_sqft], return_index=True)
+        self.group_end = np.append(self.group_start[1:], len(data))
+        self.sqft_rows = by_sqft
+        self.sqft_sorted = sqft[by_sqft]
+
+        by_ppsf = np.lexsort((ppsf, bedrooms))
+        self.ppsf_rows = by_ppsf
+        self.ppsf_sorted = ppsf[by_ppsf]
+        self.ppsf_sqft = sqft[by_ppsf]
+        self.ppsf_codes = codes[by_ppsf]
+
+        self.codes = codes
+        self.price_per_sqft = ppsf
+
+        # Output columns as plain arrays: taking a few rows from these is much
+        # cheaper than .iloc on the full frame
+        self.index = data.index
+        self.columns = {col: data[col].to_numpy() for col in RECOMMENDATION_COLUMNS}
+        # Results keep the CSV's dtypes whichever copy of the data was loaded
+        self.dtypes = {col: csv_dtype(data[col].dtype) for col in RECOMMENDATION_COLUMNS}
+
+    def _groups(self, bedrooms):
+        lo = np.searchsorted(self.bedroom_keys, bedrooms - BEDROOM_WINDOW, side="left")
+        hi = np.searchsorted(self.bedroom_keys, bedrooms + BEDROOM_WINDOW, side="right")
+        return range(lo, hi)
+
+    def _scan(self, start, end, sqft, exclude, target):
+        """Every listing of one bedroom group inside the sqft window"""
+        group_sqft = self.sqft_sorted[start:end]
+        left = start + np.searchsorted(group_sqft, sqft - SQFT_WINDOW, side="left")
+        right = start + np.searchsorted(group_sqft, sqft + SQFT_WINDOW, side="right")
+        rows = self.sqft_rows[left:right]
+        rows = rows[self.codes[rows] != exclude]
+        return np.abs(self.price_per_sqft[rows] - target), rows
+
+    def _expand(self, start, end, sqft, exclude, target, top_n):
+        """Closest listings of one bedroom group by price per sqft, searched outward
+        from the target until top_n matches are closer than anything unexamined"""
+        ppsf = self.ppsf_sorted[start:end]
+        p = np.searchsorted(ppsf, target)
+        lo = hi = p
+        step = max(512, 4 * top_n)
+        found_diff, found_rows = [], []
+        while lo > 0 or hi < len(ppsf):
+            new_lo, new_hi = max(0, lo - step), min(len(ppsf), hi + step)
+            for a, b in ((new_lo, lo), (hi, new_hi)):
+                block = slice(start + a, start + b)
+                block_sqft = self.ppsf_sqft[block]
+                keep = (
+                    (block_sqft >= sqft - SQFT_WINDOW)
+                    & (block_sqft <= sqft + SQFT_WINDOW)
+                    & (self.ppsf_codes[block] != exclude)
+                )
+                found_diff.append(np.abs(ppsf[a:b][keep] - target))
+                found_rows.append(self.ppsf_rows[block][keep])
+            lo, hi = new_lo, new_hi
+            step *= 2
+
+            bound = min(
+                target - ppsf[lo - 1] if lo > 0 else np.inf,
+                ppsf[hi] - target if hi < len(ppsf) else np.inf,
+            )
+            if sum(int((d < bound).sum()) for d in found_diff) >= top_n:
+                break
+        return np.concatenate(found_diff), np.concatenate(found_rows)
+
+    def query(self, location, sqft, bedrooms, price, top_n=5):
+        """Same result as the original full-scan get_recommendations"""
+        exclude = self.location_codes.get(location, -1)
+        target = price / sqft
+        diffs, rows = [], []
+        for g in self._groups(bedrooms):
+            start, end = self.group_start[g], self.group_end[g]
+            group_sqft = self.sqft_sorted[start:end]
+            window = (
+                np.searchsorted(group_sqft, sqft + SQFT_WINDOW, side="right")
+                - np.searchsorted(group_sqft, sqft - SQFT_WINDOW, side="left")
+            )
+            if window <= SCAN_LIMIT or top_n <= 0:
+                d, r = self._scan(start, end, sqft, exclude, target)
+            else:
+                d, r = self._expand(start, end, sqft, exclude, target, top_n)
+            diffs.append(d)
+            rows.append(r)
+
+        diff = np.concatenate(diffs) if diffs else np.empty(0)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        if len(rows) > top_n > 0:
+            kth = np.partition(diff, top_n - 1)[top_n - 1]
+            keep = diff <= kth
+            diff, rows = diff[keep], rows[keep]
+        picked = rows[np.lexsort((rows, diff))][:top_n]
+        return pd.DataFrame(
+            {col: pd.array(values[picked], dtype=self.dtypes[col]) for col, values in self.columns.items()},
+            index=self.index[picked],
+        )
+
+
+# ---------------- Geo ----------------
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; broadcasts over arrays of degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def load_coordinates(path=GEOCODE_CACHE, table=COORDINATES_TABLE):
+    """{location: (lat, lon)} from the shipped table, overridden by the geocode store"""
+    coordinates = load_coordinate_table(table)
+    coordinates.update(GeocodeCache(path, offline=True).coordinates())
+    return coordinates
+
+
+def coordinates_stamp(path=GEOCODE_CACHE, table=COORDINATES_TABLE):
+    """Changes whenever load_coordinates would return something new (file mtimes)"""
+    stamp = []
+    for p in (table, path):
+        try:
+            stamp.append(os.stat(p).st_mtime_ns)
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+class GeoRecommendationIndex:
+    """Recommendations restricted to locations within ``radius_km`` of the query.
+
+    Listings are stored grouped by location. Geocoded locations are bucketed
+    into a lat/lon grid with cells about ``radius_km`` wide, so a query only
+    computes distances to locations in the surrounding cells, then filters
+    the listings of the locations in range on bedrooms and sqft and ranks
+    them by price-per-sqft closeness (ties by dataset order).
+
+    Queries for a location without coordinates go to ``fallback`` (a
+    RecommendationIndex) when given, else return no rows. When fewer than
+    ``top_n`` nearby listings match, the rest are filled from ``fallback``.
+    """
+
+    def __init__(self, data, coordinates, radius_km=DEFAULT_RADIUS_KM, fallback=None):
+        self.radius_km = radius_km
+        self.fallback = fallback
+        codes, self.locations = pd.factorize(data["location"])
+        self.location_codes = {loc: i for i, loc in enumerate(self.locations)}
+
+        self.lat = np.full(len(self.locations), np.nan)
+        self.lon = np.full(len(self.locations), np.nan)
+        for i, loc in enumerate(self.locations):
+            if loc in coordinates and loc not in UNLOCATED:
+                self.lat[i], self.lon[i] = coordinates[loc]
+
+        # Listings grouped by location, dataset order within each group
+        order = np.argsort(codes, kind="stable")
+        self.rows = order
+        bounds = np.searchsorted(codes[order], np.arange(len(self.locations) + 1))
+        self.start, self.end = bounds[:-1], bounds[1:]
+        self.bedrooms = data["bedrooms"].to_numpy()[order]
+        self.sqft = data["total_sqft"].to_numpy()[order]
+        self.ppsf = data["price_per_sqft"].to_numpy()[order]
+
+        # Identifies the coordinates and radius behind the results (for result caches)
+        located_coordinates = sorted(
+            (loc, float(self.lat[i]), float(self.lon[i]))
+            for i, loc in enumerate(self.locations) if not np.isnan(self.lat[i])
+        )
+        self.version = hashlib.sha256(json.dumps([radius_km, located_coordinates]).encode()).hexdigest()
+
+        # Grid over geocoded locations; cells are cell_km tall and (roughly) wide
+        self.cell_km = radius_km
+        located = np.flatnonzero(~np.isnan(self.lat))
+        self._lon_scale = np.cos(np.radians(np.nanmean(self.lat))) if len(located) else 1.0
+        self._grid = {}
+        for i, cell in zip(located, zip(*self._cells(self.lat[located], self.lon[located]))):
+            self._grid.setdefault(cell, []).append(i)
+        self._grid = {cell: np.array(members) for cell, members in self._grid.items()}
+
+        self.index = data.index
+        self.columns = {col: data[col].to_numpy() for col in RECOMMENDATION_COLUMNS}
+        # Results keep the CSV's dtypes whichever copy of the data was loaded
+        self.dtypes = {col: csv_dtype(data[col].dtype) for col in RECOMMENDATION_COLUMNS}
+
+    def _cells(self, lat, lon):
+        km_per_degree = np.pi * EARTH_RADIUS_KM / 180
+        row = np.floor(np.asarray(lat) * km_per_degree / self.cell_km).astype(int)
+        col = np.floor(np.asarray(lon) * km_per_degree * self._lon_scale / self.cell_km).astype(int)
+        return row, col
+
+    def nearby(self, location, radius_km=None):
+        """(location codes, distances in km) within the radius of ``location``; None if
+        it has no coordinates"""
+        radius_km = self.radius_km if radius_km is None else radius_km
+        code = self.location_codes.get(location)
+        if code is None or np.isnan(self.lat[code]):
+            return None
+        lat, lon = self.lat[code], self.lon[code]
+        row, col = self._cells(lat, lon)
+        # One spare ring covers the longitude scale varying with latitude
+        rings = int(np.ceil(radius_km / self.cell_km)) + 1
+        candidates = [
+            self._grid[cell]
+            for cell in ((row + dr, col + dc) for dr in range(-rings, rings + 1) for dc in range(-rings, rings + 1))
+            if cell in self._grid
+        ]
+        if not candidates:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        candidates = np.concatenate(candidates)
+        distance = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distance <= radius_km
+        return candidates[keep], distance[keep]
+
+    def _select(self, location_codes, exclude, sqft, bedrooms, target, top_n):
+        positions = np.concatenate(
+            [np.arange(self.start[c], self.end[c]) for c in location_codes if c != exclude] or [np.empty(0, dtype=np.intp)]
+        )
+        keep = (
+            (np.abs(self.bedrooms[positions] - bedrooms) <= BEDROOM_WINDOW)
+            & (np.abs(self.sqft[positions] - sqft) <= SQFT_WINDOW)
+        )
+        positions = positions[keep]
+        rows = self.rows[positions]
+        diff = np.abs(self.ppsf[positions] - target)
+        return rows[np.lexsort((rows, diff))][:top_n]
+
+    def _frame(self, picked):
+        return pd.DataFrame(
+            {col: pd.array(values[picked], dtype=self.dtypes[col]) for col, values in self.columns.items()},
+            index=self.index[picked],
+        )
+
+    def _top_up(self, picked, location, sqft, bedrooms, price, top_n):
+        """``picked`` followed by the best city-wide rows not already in it, up to top_n"""
+        if len(picked) >= top_n or self.fallback is None:
+            return picked
+        extra = self.fallback.query(location, sqft, bedrooms, price, top_n + len(picked))
+        extra = self.index.get_indexer(extra.index)
+        extra = extra[~np.isin(extra, picked)][:top_n - len(picked)]
+        return np.concatenate([picked, extra])
+
+    def query(self, location, sqft, bedrooms, price, top_n=5, radius_km=None):
+        """Same columns as RecommendationIndex.query, nearby locations first"""
+        near = self.nearby(location, radius_km)
+        if near is None:
+            if self.fallback is not None:
+                return self.fallback.query(location, sqft, bedrooms, price, top_n)
+            return self._frame(np.empty(0, dtype=np.intp))
+        picked = self._select(near[0], self.location_codes[location], sqft, bedrooms, price / sqft, top_n)
+        return self._frame(self._top_up(picked, location, sqft, bedrooms, price, top_n))
+
+    def query_many(self, queries, top_n=5, radius_km=None):
+        """Recommendations for every row of ``queries`` (location, total_sqft, bedrooms,
+        price in rupees) in one long frame, in query order; ``query`` holds the
+        query's index label.
+
+        Queries are grouped by location: the nearby listings are gathered once per
+        group and ranked for all of its queries with one masked, stable argsort
+        (chunked to about BATCH_CELLS query x listing cells). Queries with fewer
+        than top_n nearby matches are topped up one by one from ``fallback``.
+        """
+        picked, owners = [], []
+        for loc, members in queries.groupby("location", sort=False, observed=True).indices.items():
+            group = queries.iloc[members]
+            near = self.nearby(loc, radius_km)
+            if near is None:
+                if self.fallback is None:
+                    continue
+                for i, sqft, bedrooms, price in zip(members, group["total_sqft"], group["bedrooms"], group["price"]):
+                    frame = self.fallback.query(loc, sqft, bedrooms, price, top_n)
+                    picked.append(self.index.get_indexer(frame.index))
+                    owners.append(np.full(len(frame), i))
+                continue
+            exclude = self.location_codes[loc]
+            positions = np.concatenate(
+                [np.arange(self.start[c], self.end[c]) for c in near[0] if c != exclude]
+                or [np.empty(0, dtype=np.intp)]
+            )
+            # Candidates in dataset order, so a stable sort on the distance breaks ties by it
+            positions = positions[np.argsort(self.rows[positions], kind="stable")]
+            rows = self.rows[positions]
+            sqft = group["total_sqft"].to_numpy(dtype=np.float64)
+            bedrooms = group["bedrooms"].to_numpy()
+            price = group["price"].to_numpy(dtype=np.float64)
+            target = price / sqft
+            step = max(1, BATCH_CELLS // max(len(positions), 1))
+            for lo in range(0, len(group), step):
+                chunk = slice(lo, lo + step)
+                diff = np.abs(self.ppsf[positions][None, :] - target[chunk, None])
+                keep = (
+                    (np.abs(self.bedrooms[positions][None, :] - bedrooms[chunk, None]) <= BEDROOM_WINDOW)
+                    & (np.abs(self.sqft[positions][None, :] - sqft[chunk, None]) <= SQFT_WINDOW)
+                )
+                diff[~keep] = np.inf
+                order = np.argsort(diff, axis=1, kind="stable")[:, :top_n]
+                found = np.take_along_axis(keep, order, axis=1)
+                counts = found.sum(axis=1)
+                if self.fallback is not None and (counts < top_n).any():
+                    # Too few nearby: top each short query up city-wide
+                    for j in np.flatnonzero(counts < top_n):
+                        i = members[chunk][j]
+                        rows_j = self._top_up(
+                            rows[order[j][found[j]]], loc, sqft[lo + j], bedrooms[lo + j], price[lo + j], top_n,
+                        )
+                        picked.append(rows_j)
+                        owners.append(np.full(len(rows_j), i))
+                    full = counts >= top_n
+                    picked.append(rows[order[full][found[full]]])
+                    owners.append(np.repeat(members[chunk][full], counts[full]))
+                    continue
+                picked.append(rows[order[found]])
+                owners.append(np.repeat(members[chunk], counts))
+
+        picked = np.concatenate(picked) if picked else np.empty(0, dtype=np.intp)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.intp)
+        order = np.argsort(owners, kind="stable")
+        result = self._frame(picked[order])
+        result.insert(0, "query", queries.index[owners[order]])
+        return result
+
+
+def main(argv=None):
+    from dataset import load_data
+
+    parser = argparse.ArgumentParser(description="Nearby similar properties for a CSV of query properties")
+    sub = parser.add_subparsers(dest="command", required=True)
+    nearby = sub.add_parser("nearby", help="Recommendations within --radius km of each query")
+    nearby.add_argument("queries", help="CSV with location, total_sqft, bedrooms, price (lakhs)")
+    nearby.add_argument("-o", "--output", default="recommendations.csv")
+    nearby.add_argument("--radius", type=float, default=DEFAULT_RADIUS_KM)
+    nearby.add_argument("--top", type=int, default=5)
+    nearby.add_argument("--geocode-cache", default=GEOCODE_CACHE)
+    nearby.add_argument("--coordinates", default=COORDINATES_TABLE)
+    args = parser.parse_args(argv)
+
+    data = load_data()
+    coordinates = load_coordinates(args.geocode_cache, args.coordinates)
+    index = GeoRecommendationIndex(data, coordinates, args.radius, fallback=RecommendationIndex(data))
+    queries = pd.read_csv(args.queries)
+    queries["price"] = queries["price"] * 100000
+    result = index.query_many(queries, args.top)
+    result.to_csv(args.output, index=False)
+    located = sum(index.nearby(loc) is not None for loc in queries["location"].unique())
+    print(f"{args.output}: {len(result):,} recommendations for {len(queries):,} queries "
+          f"({located} of {queries['location'].nunique()} query locations have coordinates, the rest city-wide)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import pickle as pk
+
+import numpy as np
+
+from instrumentation import timed
+
+MODEL_PATH = "models/house_prediction_model.pkl"
+FEATURES = ["location", "total_sqft", "bath", "balcony", "bedrooms"]
+NUMERIC_FEATURES = ["total_sqft", "bath", "balcony", "bedrooms"]
+
+
+@timed("model.unpickle")
+def load_model(path=MODEL_PATH):
+    """Unpickle the trained sklearn pipeline"""
+    with open(path, "rb") as f:
+        return pk.load(f)
+
+
+class FastScorer:
+    """Closed-form scorer for the OneHotEncoder -> StandardScaler -> LinearRegression pipeline.
+
+    The one-hot column, scaler mean/scale and coefficients are folded into a
+    location -> offset table plus a weight vector for the numeric features, so
+    a prediction is one dictionary lookup and one dot product.
+    """
+
+    def __init__(self, locations, offsets, weights):
+        self.locations = list(locations)
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.location_index = {loc: i for i, loc in enumerate(self.locations)}
+        # Identifies the model file it came from (set by model_artifact.load_scorer)
+        self.version = None
+
+    @classmethod
+    def from_params(cls, locations, mean, scale, coef, intercept):
+        """Fold scaler and regression parameters (one-hot columns first)"""
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        coef = np.asarray(coef, dtype=np.float64)
+        w = coef / scale
+        base = float(intercept) - float(np.dot(w, mean))
+        n_loc = len(locations)
+        return cls(locations, base + w[:n_loc], w[n_loc:])
+
+    @classmethod
+    def from_pipeline(cls, model):
+        """Compile a fitted sklearn pipeline as trained in the notebook"""
+        col_trans, scaler, lr = (step for _, step in model.steps)
+        if list(col_trans.feature_names_in_) != FEATURES:
+            raise ValueError(f"Unexpected model features: {list(col_trans.feature_names_in_)}")
+        ohe = col_trans.named_transformers_["onehotencoder"]
+        locations = ohe.categories_[0]
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(len(lr.coef_))
+        scale = scaler.scale_ if scaler.with_std else np.ones(len(lr.coef_))
+        return cls.from_params(locations, mean, scale, lr.coef_, lr.intercept_)
+
+    def _offset(self, location):
+        try:
+            return self.offsets[self.location_index[location]]
+        except KeyError:
+            raise ValueError(f"Unknown location: {location!r}") from None
+
+    def predict_one(self, location, total_sqft, bath, balcony, bedrooms):
+        """Price (in lakhs) for a single property"""
+        w = self.weights
+        return float(
+            self._offset(location)
+            + w[0] * total_sqft + w[1] * bath + w[2] * balcony + w[3] * bedrooms
+        )
+
+    def predict_arrays(self, locations, total_sqft, bath, balcony, bedrooms):
+        """Vectorized prediction over array-likes of equal length"""
+        codes = np.array([self.location_index.get(loc, -1) for loc in locations], dtype=np.intp)
+        if (codes < 0).any():
+            unknown = sorted({str(loc) for loc, c in zip(locations, codes) if c < 0})
+            raise ValueError(f"Unknown location(s): {unknown[:5]}")
+        numeric = np.column_stack([
+            np.asarray(total_sqft, dtype=np.float64),
+            np.asarray(bath, dtype=np.float64),
+            np.asarray(balcony, dtype=np.float64),
+            np.asarray(bedrooms, dtype=np.float64),
+        ])
+        return self.offsets[codes] + numeric @ self.weights
+
+    def predict(self, X):
+        """Drop-in for ``model.predict`` on a DataFrame with the training columns"""
+        return self.predict_arrays(*(X[col].to_numpy() for col in FEATURES))
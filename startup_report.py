@@ -0,0 +1,112 @@
+"""Cold-start timings for the app.
+
+Every measurement runs in a fresh interpreter so nothing is already imported or
+cached. Reports the cost of importing utils, of each lazy resource on first use,
+the first render of every page, and which heavy libraries each step pulled in.
+
+Usage:
+    python startup_report.py [--output startup.json] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "sklearn", "gspread", "oauth2client", "geopy", "plotly", "pydeck", "requests"]
+
+IMPORT_STEPS = {
+    "import utils": "import utils",
+    "get_data": "utils.get_data()",
+    "get_scorer": "utils.get_scorer()",
+    "get_recommendation_index": "utils.get_recommendation_index()",
+    "get_geo_recommendation_index": "utils.get_geo_recommendation_index()",
+}
+
+PAGES = [
+    "app.py",
+    "pages/1_predict.py",
+    "pages/2_property_tools.py",
+    "pages/3_market_insights.py",
+    "pages/4_history.py",
+    "pages/5_compare.py",
+]
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+setup = {setup!r}
+if setup:
+    exec(setup)
+before = set(sys.modules)
+t = time.perf_counter()
+exec({stmt!r})
+elapsed = time.perf_counter() - t
+heavy = [m for m in {heavy!r} if m in sys.modules and m not in before]
+print(json.dumps({{"seconds": elapsed, "imported": heavy}}))
+"""
+
+_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+# Pages link back to app.py, so they have to be reached from the entrypoint
+at = AppTest.from_file("app.py", default_timeout=120)
+at.session_state["logged_in"] = True
+at.session_state["username"] = "startup-report"
+if {page!r} != "app.py":
+    at.switch_page({page!r})
+t = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - t
+heavy = [m for m in {heavy!r} if m in sys.modules and m not in before]
+errors = [str(e.value) for e in at.exception]
+print(json.dumps({{"seconds": elapsed, "imported": heavy, "errors": errors}}))
+"""
+
+
+def _run(code):
+    env = dict(os.environ, GEOCODE_OFFLINE="1", POI_OFFLINE="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=300
+    )
+    if proc.returncode != 0:
+        return {"seconds": None, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _best(results):
+    timed = [r for r in results if r.get("seconds") is not None]
+    if not timed:
+        return results[-1]
+    best = min(timed, key=lambda r: r["seconds"])
+    return {**best, "runs": [round(r["seconds"], 4) for r in timed]}
+
+
+def measure(repeat=1):
+    report = {"python": sys.version.split()[0], "imports": {}, "first_render": {}}
+    for name, stmt in IMPORT_STEPS.items():
+        setup = "" if name == "import utils" else "import utils"
+        code = _IMPORT_SNIPPET.format(setup=setup, stmt=stmt, heavy=HEAVY_MODULES)
+        report["imports"][name] = _best([_run(code) for _ in range(repeat)])
+    for page in PAGES:
+        code = _RENDER_SNIPPET.format(page=page, heavy=HEAVY_MODULES)
+        report["first_render"][page] = _best([_run(code) for _ in range(repeat)])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import and first-render times")
+    parser.add_argument("--output", help="Write the JSON report here as well as printing it")
+    parser.add_argument("--repeat", type=int, default=1, help="Fresh runs per step; the fastest is kept")
+    args = parser.parse_args(argv)
+
+    report = measure(args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
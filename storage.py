@@ -0,0 +1,111 @@
+"""Storage backends for prediction history and saved properties.
+
+Both kinds of records share the same columns and are always accessed per user.
+utils.get_store picks the backend: STORAGE_BACKEND=sqlite|gsheets, defaulting
+to Google Sheets when service-account secrets are configured and SQLite otherwise.
+"""
+import pandas as pd
+
+from common import ThreadLocalSQLite
+from instrumentation import timed
+
+RECORD_COLUMNS = ["User", "Location", "Sqft", "Bedrooms", "Bathrooms", "Balconies", "Predicted Price"]
+PREDICTIONS = "predictions"
+SAVED_PROPERTIES = "saved_properties"
+TABLES = (PREDICTIONS, SAVED_PROPERTIES)
+SQLITE_PATH = "app_data.db"
+
+
+class Store:
+    """Per-user record storage. ``row`` is a sequence in RECORD_COLUMNS order."""
+
+    def append(self, table, row):
+        self.append_many(table, [row])
+
+    def append_many(self, table, rows):
+        raise NotImplementedError
+
+    def load(self, table, user):
+        """DataFrame with RECORD_COLUMNS holding only this user's rows"""
+        raise NotImplementedError
+
+    def clear(self, table, user):
+        raise NotImplementedError
+
+
+# ---------------- SQLite ----------------
+_SQL_COLUMNS = ["user", "location", "sqft", "bedrooms", "bathrooms", "balconies", "predicted_price"]
+
+
+class SQLiteStore(ThreadLocalSQLite, Store):
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__(path)
+        with self._connect() as conn:
+            for table in TABLES:
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user TEXT NOT NULL,
+                        location TEXT,
+                        sqft REAL,
+                        bedrooms INTEGER,
+                        bathrooms INTEGER,
+                        balconies INTEGER,
+                        predicted_price REAL
+                    )
+                """)
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table}(user)")
+
+    def _check(self, table):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+
+    def append_many(self, table, rows):
+        self._check(table)
+        placeholders = ", ".join("?" * len(_SQL_COLUMNS))
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(_SQL_COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row) for row in rows],
+            )
+
+    def load(self, table, user):
+        self._check(table)
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(_SQL_COLUMNS)} FROM {table} WHERE user = ? ORDER BY id", (user,)
+        )
+        return pd.DataFrame(cursor.fetchall(), columns=RECORD_COLUMNS)
+
+    def clear(self, table, user):
+        self._check(table)
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE user = ?", (user,))
+
+
+# ---------------- Google Sheets ----------------
+class GSheetStore(Store):
+    """Google Sheets backend. ``worksheets`` maps each table to a zero-argument
+    callable returning its gspread worksheet."""
+
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    @timed("gspread.append", external=True)
+    def append_many(self, table, rows):
+        self.worksheets[table]().append_rows([list(row) for row in rows])
+
+    @timed("gspread.load", external=True)
+    def load(self, table, user):
+        df = pd.DataFrame(self.worksheets[table]().get_all_records())
+        if df.empty or "User" not in df.columns:
+            return pd.DataFrame(columns=RECORD_COLUMNS)
+        return df[df["User"] == user]
+
+    @timed("gspread.clear", external=True)
+    def clear(self, table, user):
+        sheet = self.worksheets[table]()
+        records = sheet.get_all_records()
+        keep = [[r[col] for col in RECORD_COLUMNS] for r in records if r["User"] != user]
+        # Rewrite the sheet in one batch instead of one append_row per remaining row
+        sheet.clear()
+        sheet.append_rows([RECORD_COLUMNS] + keep)
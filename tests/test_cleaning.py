@@ -0,0 +1,12 @@
+import pytest
+
+from cleaning import CLEANED_DATA_PATH, DEFAULT_CHUNKSIZE, RAW_DATA_PATH, clean_file
+
+
+@pytest.mark.parametrize("chunksize", [DEFAULT_CHUNKSIZE, 997])
+def test_clean_file_reproduces_cleaned_data(tmp_path, chunksize):
+    output = tmp_path / "Cleaned_data.csv"
+    clean_file(RAW_DATA_PATH, output, chunksize)
+    with open(CLEANED_DATA_PATH, "rb") as f:
+        expected = f.read()
+    assert output.read_bytes() == expected
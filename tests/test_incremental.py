@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import make_column_transformer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from dataset import DATA_PATH
+from incremental import IncrementalState, TARGET
+from model_artifact import pipeline_params
+from scorer import NUMERIC_FEATURES
+
+FEATURES = ["location"] + NUMERIC_FEATURES
+
+
+@pytest.fixture(scope="module")
+def data():
+    data = pd.read_csv(DATA_PATH).sample(frac=1, random_state=0)
+    # Sorted by location within the shuffle, so later chunks bring in new locations
+    return data.sort_values("location", kind="stable").reset_index(drop=True)
+
+
+def full_refit(data):
+    col_trans = make_column_transformer((OneHotEncoder(sparse_output=False), ["location"]), remainder="passthrough")
+    return make_pipeline(col_trans, StandardScaler(), LinearRegression()).fit(data[FEATURES], data[TARGET])
+
+
+@pytest.mark.parametrize("chunks", [1, 5, 17])
+def test_chunked_fit_matches_full_refit(data, chunks):
+    state = IncrementalState()
+    for rows in np.array_split(np.arange(len(data)), chunks):
+        state.update(data.iloc[rows])
+
+    incremental = state.params()
+    full = pipeline_params(full_refit(data))
+
+    assert state.n == len(data)
+    assert list(incremental["locations"]) == list(full["locations"])
+    np.testing.assert_allclose(incremental["mean"], full["mean"], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(incremental["scale"], full["scale"], rtol=1e-9)
+    np.testing.assert_allclose(incremental["coef"], full["coef"], rtol=1e-8, atol=1e-8)
+    assert incremental["intercept"] == pytest.approx(full["intercept"], rel=1e-9)
+
+
+def test_state_round_trip_keeps_updating(data, tmp_path):
+    half = len(data) // 2
+    path = str(tmp_path / "state.npz")
+    IncrementalState().update(data.iloc[:half]).save(path)
+    state = IncrementalState.load(path).update(data.iloc[half:])
+
+    expected = full_refit(data).predict(data[FEATURES])
+    np.testing.assert_allclose(state.scorer().predict(data), expected, atol=1e-8)
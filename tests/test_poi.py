@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import poi
+
+LAT, LON = 12.9698, 77.7500
+DELAY = 0.3
+
+
+class StubOverpass(ThreadingHTTPServer):
+    """Answers every query with one node of the requested amenity after DELAY seconds"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.status = 200
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/interpreter"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)["data"][0]
+        amenity = query.split('"amenity"="', 1)[1].split('"', 1)[0]
+        with server.lock:
+            server.requests.append(amenity)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(DELAY)
+        with server.lock:
+            server.in_flight -= 1
+        body = json.dumps({"elements": [
+            {"lat": LAT, "lon": LON, "tags": {"name": f"Stub {amenity}"}},
+        ]}).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def overpass():
+    server = StubOverpass()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_pois(overpass, cache_path, **kwargs):
+    return poi.get_pois(LAT, LON, url=overpass.url, cache_path=str(cache_path), offline=False, **kwargs)
+
+
+def test_amenity_types_are_fetched_concurrently(overpass, tmp_path):
+    started = time.perf_counter()
+    pois, errors = get_pois(overpass, tmp_path / "poi_cache.json")
+    elapsed = time.perf_counter() - started
+
+    assert errors == {}
+    assert sorted(p["type"] for p in pois) == sorted(poi.POI_TYPES)
+    assert sorted(overpass.requests) == sorted(poi.POI_TYPES)
+    assert overpass.max_in_flight == len(poi.POI_TYPES)
+    assert elapsed < 2 * DELAY
+
+
+def test_second_call_is_served_from_the_tile_cache(overpass, tmp_path):
+    cache_path = tmp_path / "poi_cache.json"
+    first, _ = get_pois(overpass, cache_path)
+    assert len(json.loads(cache_path.read_text())) == len(poi.POI_TYPES)
+
+    second, errors = get_pois(overpass, cache_path)
+    assert errors == {}
+    assert second == first
+    assert len(overpass.requests) == len(poi.POI_TYPES)
+
+
+def test_stale_snapshot_is_served_when_overpass_fails(overpass, tmp_path, monkeypatch):
+    cache_path = tmp_path / "poi_cache.json"
+    snapshot, _ = get_pois(overpass, cache_path)
+
+    # Every cached tile is now expired, and Overpass answers 500
+    monkeypatch.setattr(poi, "CACHE_TTL", -1)
+    overpass.status = 500
+    pois, errors = get_pois(overpass, cache_path)
+    assert errors == {}
+    assert pois == snapshot
+    assert len(overpass.requests) == 2 * len(poi.POI_TYPES)
+
+    # Offline serves the same snapshot without a request
+    pois, errors = poi.get_pois(LAT, LON, url=overpass.url, cache_path=str(cache_path), offline=True)
+    assert errors == {}
+    assert pois == snapshot
+    assert len(overpass.requests) == 2 * len(poi.POI_TYPES)
+
+
+def test_failure_without_a_snapshot_is_reported_per_type(overpass, tmp_path):
+    overpass.status = 500
+    pois, errors = get_pois(overpass, tmp_path / "poi_cache.json", poi_types=("school",))
+    assert pois == []
+    assert set(errors) == {"school"}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import recommender
+from dataset import load_data, read_csv
+from recommender import RECOMMENDATION_COLUMNS, RecommendationIndex
+
+
+def full_scan(data, location, sqft, bedrooms, price, top_n=5):
+    """The original utils.get_recommendations"""
+    df = data[data["location"] != location]
+    df_similar = df[
+        (df["bedrooms"].between(bedrooms - 1, bedrooms + 1)) &
+        (df["total_sqft"].between(sqft - 200, sqft + 200))
+    ].copy()
+    df_similar["price_per_sqft_diff"] = abs(df_similar["price_per_sqft"] - (price/sqft))
+    recommendations = df_similar.sort_values("price_per_sqft_diff").head(top_n)
+    return recommendations[["location", "total_sqft", "bedrooms", "price"]]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return read_csv()
+
+
+def queries(data, n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = data.iloc[rng.choice(len(data), n, replace=False)]
+    for row, top_n in zip(rows.itertuples(), rng.choice([1, 5, 20], n)):
+        sqft = row.total_sqft * rng.uniform(0.8, 1.2)
+        price = row.price * 100000 * rng.uniform(0.7, 1.3)
+        yield row.location, sqft, row.bedrooms, price, int(top_n)
+
+
+def assert_same_ignoring_ties(got, expected, data, sqft, price):
+    target = price / sqft
+    got_diff = np.abs(data.loc[got.index, "price_per_sqft"].to_numpy() - target)
+    expected_diff = np.abs(data.loc[expected.index, "price_per_sqft"].to_numpy() - target)
+    # Same distances in the same order; rows may differ only where distances tie
+    np.testing.assert_array_equal(got_diff, np.sort(expected_diff))
+    if len(expected_diff):
+        strictly_closer = expected.index[expected_diff < expected_diff.max()]
+        assert set(strictly_closer) <= set(got.index)
+    # Same values and CSV dtypes, also when the index was built from the columnar copy
+    pd.testing.assert_frame_equal(got, data.loc[got.index, RECOMMENDATION_COLUMNS])
+
+
+@pytest.mark.parametrize("scan_limit", [recommender.SCAN_LIMIT, 0])
+@pytest.mark.parametrize("loader", [read_csv, load_data])
+def test_query_matches_full_scan(data, loader, scan_limit, monkeypatch):
+    # scan_limit 0 sends every window through the outward search
+    monkeypatch.setattr(recommender, "SCAN_LIMIT", scan_limit)
+    index = RecommendationIndex(loader())
+    for location, sqft, bedrooms, price, top_n in queries(data):
+        got = index.query(location, sqft, bedrooms, price, top_n)
+        expected = full_scan(data, location, sqft, bedrooms, price, top_n)
+        assert_same_ignoring_ties(got, expected, data, sqft, price)
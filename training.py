@@ -0,0 +1,260 @@
+"""Model selection and training on a sparse design matrix.
+
+The design keeps the location one-hot block sparse (one stored value per row)
+and standardizes only the four numeric columns, so memory and fit time grow
+with the number of listings, not listings x locations. The encoded inputs
+(location codes, numeric columns, target) are cached per data file hash in
+models/training_cache/, so repeated runs skip parsing and encoding.
+
+Every (candidate, fold) fit of the k-fold cross-validation runs as its own
+joblib task across cores. Candidates are ranked by mean RMSE (lakhs). The
+best candidate the NumPy artifact can represent (a linear model) is refitted
+on all rows and exported with model_artifact.save_artifact; non-linear
+candidates are ranked in the report for comparison only.
+
+    python training.py [Cleaned_data.csv] [--folds 5] [--jobs -1] [--output models/house_prediction_model.json]
+
+A new artifact invalidates models/price_intervals.json: rerun calibration.py.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.model_selection import KFold
+
+from common import atomic_write
+from dataset import DATA_PATH, file_hash
+from incremental import TARGET
+from model_artifact import ARTIFACT_PATH, save_artifact
+from scorer import NUMERIC_FEATURES
+
+CACHE_DIR = "models/training_cache"
+DESIGN_VERSION = 1
+REPORT_PATH = "models/training_report.json"
+DEFAULT_FOLDS = 5
+
+CANDIDATES = {
+    "linear": LinearRegression(),
+    "ridge(alpha=0.1)": Ridge(alpha=0.1),
+    "ridge(alpha=1)": Ridge(alpha=1.0),
+    "ridge(alpha=10)": Ridge(alpha=10.0),
+    "lasso(alpha=0.01)": Lasso(alpha=0.01, max_iter=5000),
+    "lasso(alpha=0.1)": Lasso(alpha=0.1, max_iter=5000),
+    "gbr": GradientBoostingRegressor(n_estimators=200, max_depth=3, learning_rate=0.1, random_state=0),
+}
+# Candidates whose coef_ / intercept_ fit the linear artifact format
+LINEAR = (LinearRegression, Ridge, Lasso)
+
+
+# ---------------- Design ----------------
+class Design:
+    """Encoded training data: location codes into ``locations``, raw numeric
+    columns and the target"""
+
+    def __init__(self, locations, codes, numeric, y):
+        self.locations = list(locations)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.numeric = np.asarray(numeric, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.y)
+
+    @classmethod
+    def from_frame(cls, data):
+        data = data.dropna(subset=["location", TARGET] + NUMERIC_FEATURES)
+        location = pd.Categorical(data["location"].astype(str))
+        return cls(location.categories, location.codes, data[NUMERIC_FEATURES].to_numpy(), data[TARGET].to_numpy())
+
+    def scaling(self, rows=None):
+        """Mean and scale of the numeric columns (StandardScaler conventions)"""
+        numeric = self.numeric if rows is None else self.numeric[rows]
+        mean = numeric.mean(axis=0)
+        scale = numeric.std(axis=0)
+        scale[scale == 0] = 1.0
+        return mean, scale
+
+    def matrix(self, rows=None, mean=None, scale=None):
+        """CSR [one-hot locations | standardized numeric] for ``rows`` (all by default)"""
+        codes = self.codes if rows is None else self.codes[rows]
+        numeric = self.numeric if rows is None else self.numeric[rows]
+        n, n_loc, n_num = len(codes), len(self.locations), numeric.shape[1]
+        values = np.empty((n, 1 + n_num))
+        values[:, 0] = 1.0
+        values[:, 1:] = (numeric - mean) / scale
+        columns = np.empty((n, 1 + n_num), dtype=np.int64)
+        columns[:, 0] = codes
+        columns[:, 1:] = n_loc + np.arange(n_num)
+        indptr = np.arange(0, n * (1 + n_num) + 1, 1 + n_num)
+        return sparse.csr_matrix((values.ravel(), columns.ravel(), indptr), shape=(n, n_loc + n_num))
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"design-{digest[:16]}.npz")
+
+
+def load_design(data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """(Design, whether it came from the cache) for the data file's current contents"""
+    digest = file_hash(data_path)
+    path = _cache_path(digest, cache_dir)
+    try:
+        with np.load(path, allow_pickle=False) as cached:
+            if int(cached["version"]) == DESIGN_VERSION and str(cached["data_hash"]) == digest:
+                return Design(cached["locations"].tolist(), cached["codes"], cached["numeric"], cached["y"]), True
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+
+    design = Design.from_frame(pd.read_csv(data_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    with atomic_write(path, "wb") as f:
+        np.savez(
+            f, version=DESIGN_VERSION, data_hash=digest, locations=np.asarray(design.locations, dtype=str),
+            codes=design.codes, numeric=design.numeric, y=design.y,
+        )
+    return design, False
+
+
+# ---------------- Cross-validation ----------------
+def _fit_fold(design, estimator, train, test):
+    """Fit one candidate on one fold; scaling is fitted on the training rows only"""
+    mean, scale = design.scaling(train)
+    started = time.perf_counter()
+    model = clone(estimator).fit(design.matrix(train, mean, scale), design.y[train])
+    fit_seconds = time.perf_counter() - started
+    error = model.predict(design.matrix(test, mean, scale)) - design.y[test]
+    y_test = design.y[test]
+    return {
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "mae": float(np.mean(np.abs(error))),
+        "r2": float(1 - np.sum(error ** 2) / np.sum((y_test - y_test.mean()) ** 2)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def cross_validate(design, candidates=None, folds=DEFAULT_FOLDS, n_jobs=-1, seed=0):
+    """{name: summary} for every candidate, all (candidate, fold) fits in parallel"""
+    candidates = CANDIDATES if candidates is None else candidates
+    splits = list(KFold(folds, shuffle=True, random_state=seed).split(design.y))
+    tasks = [(name, train, test) for name in candidates for train, test in splits]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(design, candidates[name], train, test) for name, train, test in tasks
+    )
+    by_name = {}
+    for (name, _, _), result in zip(tasks, results):
+        by_name.setdefault(name, []).append(result)
+    return {
+        name: {
+            "rmse": float(np.mean([r["rmse"] for r in runs])),
+            "rmse_std": float(np.std([r["rmse"] for r in runs])),
+            "mae": float(np.mean([r["mae"] for r in runs])),
+            "r2": float(np.mean([r["r2"] for r in runs])),
+            "fit_seconds": float(np.sum([r["fit_seconds"] for r in runs])),
+            "exportable": isinstance(candidates[name], LINEAR),
+        }
+        for name, runs in by_name.items()
+    }
+
+
+# ---------------- Final model ----------------
+def fit_final(design, estimator):
+    """Refit on every row; returns artifact params (one-hot columns first)"""
+    mean, scale = design.scaling()
+    model = clone(estimator).fit(design.matrix(None, mean, scale), design.y)
+    n_loc = len(design.locations)
+    return {
+        "locations": design.locations,
+        # The one-hot block is not scaled: mean 0 and scale 1 fold it through unchanged
+        "mean": np.concatenate([np.zeros(n_loc), mean]),
+        "scale": np.concatenate([np.ones(n_loc), scale]),
+        "coef": np.asarray(model.coef_, dtype=np.float64),
+        "intercept": np.float64(model.intercept_),
+    }
+
+
+def train(data_path=DATA_PATH, output=ARTIFACT_PATH, report_path=REPORT_PATH, folds=DEFAULT_FOLDS,
+          n_jobs=-1, candidates=None, cache_dir=CACHE_DIR):
+    """Cross-validate, export the best linear candidate and write the report"""
+    candidates = CANDIDATES if candidates is None else candidates
+    timings = {}
+    started = time.perf_counter()
+    design, cache_hit = load_design(data_path, cache_dir)
+    timings["design_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scores = cross_validate(design, candidates, folds, n_jobs)
+    timings["cv_seconds"] = time.perf_counter() - started
+
+    ranking = sorted(scores, key=lambda name: scores[name]["rmse"])
+    selected = next((name for name in ranking if scores[name]["exportable"]), None)
+    if selected is None:
+        raise ValueError("no linear candidate to export")
+
+    started = time.perf_counter()
+    import sklearn
+    header = save_artifact(fit_final(design, candidates[selected]), output, {
+        "sklearn_version": sklearn.__version__,
+        "estimator": selected,
+        "cv_rmse": scores[selected]["rmse"],
+        "data_hash": file_hash(data_path),
+    })
+    timings["final_fit_seconds"] = time.perf_counter() - started
+
+    report = {
+        "data": data_path,
+        "data_hash": header["data_hash"],
+        "rows": len(design),
+        "locations": len(design.locations),
+        "folds": folds,
+        "n_jobs": n_jobs,
+        "design_cache_hit": cache_hit,
+        "timings": timings,
+        "ranking": ranking,
+        "candidates": scores,
+        "selected": selected,
+        "best_overall": ranking[0],
+        "artifact": output,
+        "artifact_sha256": header["sha256"],
+    }
+    with atomic_write(report_path) as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate candidate models and export the best one")
+    parser.add_argument("data", nargs="?", default=DATA_PATH)
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits (-1: all cores)")
+    parser.add_argument("--candidates", nargs="+", choices=list(CANDIDATES), help="Default: all")
+    args = parser.parse_args(argv)
+
+    candidates = {name: CANDIDATES[name] for name in args.candidates} if args.candidates else None
+    report = train(args.data, args.output, args.report, args.folds, args.jobs, candidates)
+
+    timings = report["timings"]
+    print(f"{report['rows']:,} rows, {report['locations']} locations, {report['folds']} folds; "
+          f"design {timings['design_seconds']:.2f}s ({'cached' if report['design_cache_hit'] else 'built'}), "
+          f"cv {timings['cv_seconds']:.2f}s, final fit {timings['final_fit_seconds']:.2f}s")
+    for name in report["ranking"]:
+        s = report["candidates"][name]
+        marker = "*" if name == report["selected"] else " "
+        print(f"{marker} {name:<20} rmse {s['rmse']:8.2f} ± {s['rmse_std']:6.2f}  mae {s['mae']:7.2f}  "
+              f"r2 {s['r2']:6.3f}  fit {s['fit_seconds']:6.2f}s{'' if s['exportable'] else '  (not exportable)'}")
+    print(f"{report['artifact']}: {report['selected']}, sha256 {report['artifact_sha256'][:12]}")
+    if report["best_overall"] != report["selected"]:
+        print(f"note: {report['best_overall']} scored better but does not fit the linear artifact format")
+    print("Rerun calibration.py so the price intervals match the new model.")
+
+
+if __name__ == "__main__":
+    main()
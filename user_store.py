@@ -0,0 +1,140 @@
+"""User accounts for login and registration.
+
+Both backends share one interface: ``get(username)`` returns the user's record
+(a dict with at least "password", the sha256 hex digest) or None, and
+``add(username, record)`` inserts a new user and returns False when the name
+is taken. utils.get_user_store picks the backend: USER_STORE=json|sqlite,
+defaulting to users.json.
+
+The JSON store keeps an in-memory index that is reloaded only when the file's
+mtime/size changes, and registers users under an exclusive lock on a sidecar
+.lock file (common.file_lock). The file is re-read under the
+lock and replaced atomically, so concurrent sign-ups from several processes
+never lose each other's writes.
+
+Copy users.json into SQLite with:
+    python user_store.py migrate [users.json] [app_data.db]
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+
+from common import ThreadLocalSQLite, atomic_write, file_lock
+from storage import SQLITE_PATH
+
+USER_DB = "users.json"
+
+class UserStore:
+    def get(self, username):
+        raise NotImplementedError
+
+    def add(self, username, record):
+        """Insert a new user; False if the username already exists"""
+        raise NotImplementedError
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+
+# ---------------- JSON file ----------------
+class JSONUserStore(UserStore):
+    def __init__(self, path=USER_DB):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._users = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("users", {})
+        except FileNotFoundError:
+            return {}
+
+    def _index(self):
+        # One stat() per lookup; the file is only re-parsed after it changed
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            with self._lock:
+                self._users = self._read()
+                self._stamp = stamp
+        return self._users
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    def _write(self, users):
+        with atomic_write(self.path, fsync=True) as f:
+            json.dump({"users": users}, f, indent=4)
+
+    def get(self, username):
+        return self._index().get(username)
+
+    def add(self, username, record):
+        with self._exclusive():
+            # Re-read under the lock: another process may have registered since
+            users = self._read()
+            if username in users:
+                return False
+            users[username] = record
+            self._write(users)
+            self._users = users
+            self._stamp = self._file_stamp()
+        return True
+
+
+# ---------------- SQLite ----------------
+class SQLiteUserStore(ThreadLocalSQLite, UserStore):
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__(path)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    password TEXT NOT NULL,
+                    extra TEXT NOT NULL DEFAULT '{}'
+                )
+            """)
+
+    def get(self, username):
+        row = self._connect().execute(
+            "SELECT password, extra FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"password": row[0], **json.loads(row[1])}
+
+    def add(self, username, record):
+        extra = {key: value for key, value in record.items() if key != "password"}
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password, extra) VALUES (?, ?, ?)",
+                (username, record["password"], json.dumps(extra)),
+            )
+        return cursor.rowcount == 1
+
+
+def migrate(json_path=USER_DB, sqlite_path=SQLITE_PATH):
+    """Copy every user from the JSON file into SQLite; returns how many were added"""
+    source = JSONUserStore(json_path)
+    target = SQLiteUserStore(sqlite_path)
+    return sum(target.add(username, record) for username, record in source._index().items())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        sys.exit("usage: python user_store.py migrate [users.json] [app_data.db]")
+    added = migrate(*sys.argv[2:4])
+    print(f"Added {added} users")
@@ -1,12 +1,19 @@
-import numpy as np
 import pandas as pd
-from geopy.geocoders import Nominatim
-import pickle as pk
 import streamlit as st
 import hashlib
-import json
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import os
+from model_artifact import ArtifactError, load_scorer
+from dataset import load_data
+from recommender import GeoRecommendationIndex, RecommendationIndex, coordinates_stamp, load_coordinates
+from geocode import LOOKUP_TIMEOUT, default_cache
+from storage import GSheetStore, SQLiteStore, SQLITE_PATH, PREDICTIONS, SAVED_PROPERTIES, RECORD_COLUMNS
+from write_queue import WriteBehindQueue
+from user_store import USER_DB, JSONUserStore, SQLiteUserStore
+from prediction_cache import PredictionCache, prediction_key
+from prediction_client import PredictionClient
+from calibration import load_intervals
+from location_index import load_location_index
+from instrumentation import page_end, timed
 
 def show_navigation():
     st.sidebar.markdown("## 🔍 Navigation")
@@ -18,11 +25,48 @@ def show_navigation():
     st.sidebar.page_link("pages/5_compare.py", label="📌 Compare Properties")
 
 
-# Load model & dataset once
-with open("models/house_prediction_model.pkl", "rb") as f:
-    model = pk.load(f)
-data = pd.read_csv("Cleaned_data.csv")
-data["price_per_sqft"] = (data["price"] * 100000) / data["total_sqft"]
+# ---------------- Model & Dataset (loaded on first use) ----------------
+@st.cache_resource
+@timed()
+def get_scorer():
+    # NumPy-only model artifact when present, the sklearn pickle otherwise
+    return load_scorer()
+
+@st.cache_resource
+@timed()
+def get_data():
+    # Memory-mapped columnar copy when it is current, Cleaned_data.csv otherwise
+    return load_data()
+
+@st.cache_resource
+@timed()
+def get_recommendation_index():
+    return RecommendationIndex(get_data())
+
+@st.cache_resource(max_entries=1)
+@timed()
+def _build_geo_recommendation_index(stamp):
+    return GeoRecommendationIndex(get_data(), load_coordinates(), fallback=get_recommendation_index())
+
+def get_geo_recommendation_index():
+    # Shipped coordinates table refined by the geocode store; rebuilt when either
+    # file changes, so newly geocoded locations are picked up without a restart
+    return _build_geo_recommendation_index(coordinates_stamp())
+
+_LAZY_ATTRIBUTES = {
+    # The scorer is a drop-in for the pipeline's predict()
+    "model": get_scorer,
+    "scorer": get_scorer,
+    "data": get_data,
+    "recommendation_index": get_recommendation_index,
+    "geo_recommendation_index": get_geo_recommendation_index,
+}
+
+def __getattr__(name):
+    # Keeps `from utils import model, data` working without loading them at import time
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def calculate_emi(principal, annual_rate, tenure_years):
     """Calculate EMI for loan"""
@@ -31,49 +75,107 @@ def calculate_emi(principal, annual_rate, tenure_years):
     emi = (principal * r * (1 + r) ** n) / ((1 + r) ** n - 1)
     return round(emi, 2)
 
+@timed()
 def get_recommendations(location, sqft, bedrooms, price, top_n=5):
-    df = data[data["location"] != location]
-    df_similar = df[
-        (df["bedrooms"].between(bedrooms - 1, bedrooms + 1)) &
-        (df["total_sqft"].between(sqft - 200, sqft + 200))
-    ]
-    df_similar["price_per_sqft_diff"] = abs(df_similar["price_per_sqft"] - (price/sqft))
-    recommendations = df_similar.sort_values("price_per_sqft_diff").head(top_n)
-    return recommendations[["location", "total_sqft", "bedrooms", "price"]]
+    """Properties in other locations within 5 km (city-wide if this location has no
+    coordinates) with +/-1 bedroom and +/-200 sqft, closest in price per sqft"""
+    return get_geo_recommendation_index().query(location, sqft, bedrooms, price, top_n)
+
+@st.cache_resource
+def get_location_index():
+    """Typo-tolerant lookup over the model's locations"""
+    return load_location_index(get_scorer().locations)
 
-def get_lat_lon(location_name: str):
-    """Fetch latitude & longitude for a location"""
+@st.cache_resource
+def get_price_intervals():
+    """Conformal interval table for the loaded model, or None if it needs rebuilding"""
+    scorer = get_scorer()
     try:
-        geolocator = Nominatim(user_agent="house_price_app")
-        loc = geolocator.geocode(f"{location_name}, Bangalore, India")
-        if loc:
-            return loc.latitude, loc.longitude
-    except Exception:
-        return None, None
-    return None, None
+        return load_intervals(scorer.locations, model_version=scorer.version)
+    except ArtifactError:
+        return None
 
-USER_DB = "users.json"
+@st.cache_resource
+def get_prediction_cache():
+    """Shared across sessions; persisted to PREDICTION_CACHE_PATH when it is set"""
+    return PredictionCache(path=os.environ.get("PREDICTION_CACHE_PATH"))
 
-# ---------------- User DB Helpers ----------------
-def load_users():
-    try:
-        with open(USER_DB, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"users": {}}
+@st.cache_resource
+def get_prediction_client():
+    """Client for prediction_service.py at PREDICTION_SERVICE_URL, or None to score in-process"""
+    url = os.environ.get("PREDICTION_SERVICE_URL")
+    return PredictionClient(url) if url else None
+
+@timed()
+def predict_price(location, sqft, bath, balcony, bedrooms):
+    """(predicted price, (lower, upper), recommendations) in rupees, cached per input
+    for the loaded model, data and interval table"""
+    scorer = get_scorer()
+    intervals = get_price_intervals()
+    cache = get_prediction_cache()
+    cache.set_version((
+        scorer.version, get_data().attrs.get("source_hash"), intervals and intervals.version,
+        get_geo_recommendation_index().version,
+    ))
+    key = prediction_key(location, sqft, bath, balcony, bedrooms)
+
+    client = get_prediction_client()
+
+    def compute():
+        remote = client.predict(*key) if client else None
+        if remote is not None:
+            lakhs, lower, upper = remote["price"], remote["low"], remote["high"]
+        else:
+            lakhs = scorer.predict_one(*key)
+            if intervals is not None:
+                lower, upper = intervals.interval(key[0], key[4], lakhs)
+            else:
+                # No calibration for this model yet: fall back to +/-10%
+                lower, upper = lakhs * 0.9, lakhs * 1.1
+        price = lakhs * 100000
+        recs = client.recommend(key[0], key[1], key[4], price) if client else None
+        if recs is None:
+            recs = get_recommendations(key[0], key[1], key[4], price)
+        return {
+            "price": price,
+            "range": [float(lower) * 100000, float(upper) * 100000],
+            "recommendations": recs.to_dict(orient="split"),
+        }
+
+    result = cache.get_or_compute(key, compute)
+    return result["price"], tuple(result["range"]), pd.DataFrame(**result["recommendations"])
+
+@timed()
+def get_lat_lon(location_name: str, timeout=LOOKUP_TIMEOUT):
+    """Fetch latitude & longitude for a location (served from the geocode cache)"""
+    return default_cache().get(location_name, timeout=timeout)
 
-def save_users(users):
-    with open(USER_DB, "w") as f:
-        json.dump(users, f, indent=4)
+# ---------------- User DB Helpers ----------------
+@st.cache_resource
+def get_user_store():
+    """Account store selected by USER_STORE (json or sqlite)"""
+    backend = os.environ.get("USER_STORE", "json")
+    if backend == "json":
+        return JSONUserStore(USER_DB)
+    if backend == "sqlite":
+        return SQLiteUserStore(os.environ.get("SQLITE_PATH", SQLITE_PATH))
+    raise ValueError(f"Unknown USER_STORE: {backend}")
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
+@timed()
 def authenticate(username, password):
-    users = load_users()["users"]
-    if username in users:
-        return users[username]["password"] == hash_password(password)
-    return False
+    user = get_user_store().get(username)
+    return user is not None and user["password"] == hash_password(password)
+
+@timed()
+def register_user(username, password):
+    """Create the account; False if the username is already taken"""
+    return get_user_store().add(username, {
+        "password": hash_password(password),
+        "saved_properties": []
+    })
 
  # ---------------- Login Form ----------------
 def login_form():
@@ -89,25 +191,24 @@ def login_form():
                 st.session_state["logged_in"] = True
                 st.session_state["username"] = username_input
                 st.success(f"Welcome, {username_input}!")
+                page_end()
                 st.switch_page("app.py")  # reload page to show home/dashboard
             else:
                 st.error("Invalid username or password")
 
         if register_button:
-            users = load_users()
-            if username_input in users["users"]:
-                st.error("Username already exists")
-            else:
-                users["users"][username_input] = {
-                    "password": hash_password(password_input),
-                    "saved_properties": []
-                }
-                save_users(users)
+            if register_user(username_input, password_input):
                 st.success("User registered successfully! You can now login.")
+            else:
+                st.error("Username already exists")
 
 
 @st.cache_resource
+@timed(external=True)
 def connect_gsheet():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     scope = [
         "https://spreadsheets.google.com/feeds",
         "https://www.googleapis.com/auth/drive"
@@ -128,53 +229,12 @@ def connect_gsheet():
 
     return sheet
 
-sheet = connect_gsheet()
-
-def save_prediction(user, loc, sqft, beds, bath, balc, price):
-    sheet = connect_gsheet()
-    sheet.append_row([user, loc, sqft, beds, bath, balc, price])
-
-def load_predictions(user):
-    """Load only the logged-in user's predictions"""
-    records = sheet.get_all_records()
-    df = pd.DataFrame(records)
-
-    if not df.empty and "User" in df.columns:
-        df = df[df["User"] == user]  # filter only this user
-    return df
-
-def clear_user_history(user):
-    sheet = connect_gsheet()
-    records = sheet.get_all_records()
-
-    # Keep only rows that are NOT from this user
-    filtered_records = [r for r in records if r["User"] != user]
-
-    # Clear everything
-    sheet.clear()
-
-    # Write header back
-    sheet.append_row(["User", "Location", "Sqft", "Bedrooms", "Bathrooms", "Balconies", "Predicted Price"])
-
-    # Write back only rows from other users
-    for row in filtered_records:
-        sheet.append_row([
-            row["User"], row["Location"], row["Sqft"], row["Bedrooms"],
-            row["Bathrooms"], row["Balconies"], row["Predicted Price"]
-        ])
-
-def load_history(user):
-    sheet = connect_gsheet()
-    records = sheet.get_all_records()
-    df = pd.DataFrame(records)
-
-    if df.empty:
-        return df
-
-    # Filter only this user's rows
-    return df[df["User"] == user]
-
+@st.cache_resource
+@timed(external=True)
 def connect_gsheet_tab(tab_name):
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     scope = [
         "https://spreadsheets.google.com/feeds",
         "https://www.googleapis.com/auth/drive"
@@ -185,37 +245,71 @@ def connect_gsheet_tab(tab_name):
     client = gspread.authorize(creds)
     return client.open_by_key("1Bj53zxVKeLE_jVTTITq8xokIsj8JO4klbdJbwj0z4O4").worksheet(tab_name)
 
+# ---------------- Storage Backend ----------------
+def _has_gsheet_secrets():
+    try:
+        return "gcp_service_account" in st.secrets
+    except Exception:
+        return False
+
+@st.cache_resource
+def get_store():
+    """History / saved-property store selected by STORAGE_BACKEND (sqlite or gsheets)"""
+    backend = os.environ.get("STORAGE_BACKEND")
+    if backend is None:
+        backend = "gsheets" if _has_gsheet_secrets() else "sqlite"
+    if backend == "gsheets":
+        return GSheetStore({
+            PREDICTIONS: connect_gsheet,
+            SAVED_PROPERTIES: lambda: connect_gsheet_tab("SavedProperties"),
+        })
+    if backend == "sqlite":
+        return SQLiteStore(os.environ.get("SQLITE_PATH", SQLITE_PATH))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+@st.cache_resource
+def get_write_queue():
+    """Background writer so saves never block the page on the store"""
+    return WriteBehindQueue(get_store())
+
+def _with_pending(df, table, user):
+    # Rows saved this session may still be waiting in the write-behind queue
+    pending = get_write_queue().pending(table, user)
+    if not pending:
+        return df
+    pending_df = pd.DataFrame(pending, columns=RECORD_COLUMNS)
+    return pending_df if df.empty else pd.concat([df, pending_df], ignore_index=True)
+
+# ---------------- Prediction History ----------------
+@timed()
+def save_prediction(user, loc, sqft, beds, bath, balc, price):
+    get_write_queue().enqueue(PREDICTIONS, [user, loc, sqft, beds, bath, balc, price])
+
+@timed()
+def load_predictions(user):
+    """Load only the logged-in user's predictions"""
+    return _with_pending(get_store().load(PREDICTIONS, user), PREDICTIONS, user)
+
+@timed()
+def clear_user_history(user):
+    # Waits for a flush in progress, so it cannot write the cleared rows back
+    get_write_queue().clear(PREDICTIONS, user)
+
+def load_history(user):
+    return load_predictions(user)
+
 # ---------------- Saved Properties ----------------
+@timed()
 def save_property_for_user(user, loc, sqft, beds, bath, balc, price):
-    sheet = connect_gsheet_tab("SavedProperties")
-    sheet.append_row([user, loc, sqft, beds, bath, balc, price])
+    get_write_queue().enqueue(SAVED_PROPERTIES, [user, loc, sqft, beds, bath, balc, price])
 
+@timed()
 def load_saved_properties(user):
-    sheet = connect_gsheet_tab("SavedProperties")
-    records = sheet.get_all_records()
-    df = pd.DataFrame(records)
-
-    if df.empty:
-        return []
-
     # Only this user’s saved properties
-    df = df[df["User"] == user]
+    df = _with_pending(get_store().load(SAVED_PROPERTIES, user), SAVED_PROPERTIES, user)
     return df.to_dict(orient="records")
 
+@timed()
 def clear_saved_properties(user):
-    sheet = connect_gsheet_tab("SavedProperties")
-    records = sheet.get_all_records()
-
-    # Keep rows from other users
-    filtered_records = [r for r in records if r["User"] != user]
-
-    # Clear everything
-    sheet.clear()
-    sheet.append_row(["User", "Location", "Sqft", "Bedrooms", "Bathrooms", "Balconies", "Predicted Price"])
-
-    # Re-add data from other users
-    for row in filtered_records:
-        sheet.append_row([
-            row["User"], row["Location"], row["Sqft"], row["Bedrooms"],
-            row["Bathrooms"], row["Balconies"], row["Predicted Price"]
-        ])
+    # Waits for a flush in progress, so it cannot write the cleared rows back
+    get_write_queue().clear(SAVED_PROPERTIES, user)
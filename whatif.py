@@ -0,0 +1,87 @@
+"""What-if sweeps: score a whole grid of inputs in one batched prediction.
+
+Each input may be a single value or a 1-D array of values to sweep; the grid is
+the cartesian product of all of them. ``bath="bedrooms"`` ties the bathroom
+count to the bedroom count instead of sweeping it separately.
+
+    from model_artifact import load_scorer
+    from whatif import sweep
+    result = sweep(load_scorer(), ["Whitefield", "Hebbal"], sqft=range(200, 10001, 100), bedrooms=range(1, 11))
+    result.prices.shape      # (2 locations, 99 sqft, 10 bedrooms, 1 bath, 1 balcony)
+    result.to_frame()        # one row per grid point
+"""
+import numpy as np
+import pandas as pd
+
+AXES = ("location", "total_sqft", "bedrooms", "bath", "balcony")
+DEFAULT_SQFT = np.arange(200, 10001, 100)
+DEFAULT_BEDROOMS = np.arange(1, 11)
+
+
+class SweepResult:
+    def __init__(self, axes, prices, low=None, high=None):
+        self.axes = axes
+        self.prices = prices
+        self.low = low
+        self.high = high
+
+    def __len__(self):
+        return self.prices.size
+
+    def to_frame(self):
+        """Long format: one row per grid point with the inputs and predicted price (lakhs)"""
+        grids = np.meshgrid(*(self.axes[name] for name in AXES), indexing="ij")
+        frame = pd.DataFrame({name: grid.ravel() for name, grid in zip(AXES, grids)})
+        if self.axes["bath"] is None:
+            frame["bath"] = frame["bedrooms"]
+        frame["price"] = self.prices.ravel()
+        if self.low is not None:
+            frame["price_low"] = self.low.ravel()
+            frame["price_high"] = self.high.ravel()
+        return frame
+
+    def curves(self, location=None, bath=0, balcony=0):
+        """sqft x bedrooms price table for one location (index: total_sqft, columns: bedrooms)"""
+        i = 0 if location is None else list(self.axes["location"]).index(location)
+        return pd.DataFrame(
+            self.prices[i, :, :, bath, balcony],
+            index=pd.Index(self.axes["total_sqft"], name="total_sqft"),
+            columns=pd.Index(self.axes["bedrooms"], name="bedrooms"),
+        )
+
+
+def _axis(values):
+    return np.atleast_1d(np.asarray(values))
+
+
+def sweep(scorer, locations, sqft=DEFAULT_SQFT, bedrooms=DEFAULT_BEDROOMS, bath="bedrooms", balcony=0,
+          intervals=None):
+    """Predict every combination of the given inputs with one scorer.predict_arrays call.
+
+    Prices are in lakhs with shape (locations, sqft, bedrooms, bath, balcony); the
+    bath axis has length 1 when ``bath="bedrooms"``. With a calibration.PriceIntervals
+    table, ``low`` / ``high`` bounds of the same shape are filled in too.
+    """
+    tied_bath = isinstance(bath, str) and bath == "bedrooms"
+    axes = {
+        "location": _axis(locations).astype(str),
+        "total_sqft": _axis(sqft).astype(np.float64),
+        "bedrooms": _axis(bedrooms).astype(np.int64),
+        "bath": None if tied_bath else _axis(bath).astype(np.float64),
+        "balcony": _axis(balcony).astype(np.float64),
+    }
+    shape = tuple(1 if values is None else len(values) for values in axes.values())
+    index = np.indices(shape).reshape(len(shape), -1)
+
+    location = axes["location"][index[0]]
+    bedrooms_flat = axes["bedrooms"][index[2]]
+    bath_flat = bedrooms_flat if tied_bath else axes["bath"][index[3]]
+    prices = scorer.predict_arrays(
+        location, axes["total_sqft"][index[1]], bath_flat, axes["balcony"][index[4]], bedrooms_flat
+    )
+
+    low = high = None
+    if intervals is not None:
+        low, high = intervals.intervals(location, bedrooms_flat, prices)
+        low, high = low.reshape(shape), high.reshape(shape)
+    return SweepResult(axes, prices.reshape(shape), low, high)
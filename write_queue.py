@@ -0,0 +1,207 @@
+"""Write-behind queue in front of a storage.Store.
+
+Saves are appended to a local journal and return immediately; a background
+worker flushes them to the store in batches once ``batch_size`` rows are queued
+or ``flush_interval`` seconds have passed. Failed flushes are retried with
+exponential backoff. Entries stay in the journal until the store has accepted
+them, so queued writes survive a restart, and pending writes are flushed when
+the process exits.
+
+The journal is shared by every server process using the same path, so the
+file, not process memory, is the queue. Appends, reads and rewrites happen
+under an exclusive lock on <journal>.lock, and a flush holds <journal>.flush.lock
+from reading its batch until it has removed exactly those entries (by id), so
+no entry is flushed twice and other processes' appends are never dropped.
+discard and clear take the flush lock too, so they wait for a flush in
+progress instead of racing it.
+"""
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from common import atomic_write, file_lock
+
+JOURNAL_PATH = "write_journal.jsonl"
+
+
+def _to_json(value):
+    # numpy scalars from pandas/model output
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class WriteBehindQueue:
+    def __init__(self, store, journal_path=JOURNAL_PATH, batch_size=50, flush_interval=2.0,
+                 max_backoff=60.0):
+        self.store = store
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._failures = 0
+        self.last_error = None
+
+        # Rows enqueued by this process since its last flush; entries left by a
+        # previous run count towards the first batch
+        self._queued = len(self._locked_read())
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    # ---------------- Journal ----------------
+    @contextlib.contextmanager
+    def _journal(self):
+        """Exclusive access to the journal file, across threads and processes"""
+        with self._journal_lock, file_lock(self.journal_path + ".lock"):
+            yield
+
+    @contextlib.contextmanager
+    def _flushing(self):
+        """Held by one flush (or discard/clear) at a time, across processes"""
+        with self._flush_lock, file_lock(self.journal_path + ".flush.lock"):
+            yield
+
+    # Callers hold _journal()
+    def _read_journal(self):
+        entries = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            # Torn last line from a crash mid-write
+                            continue
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _locked_read(self):
+        with self._journal():
+            return self._read_journal()
+
+    def _append_journal(self, entry):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=_to_json) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self, entries):
+        with atomic_write(self.journal_path, fsync=True) as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=_to_json) + "\n")
+
+    def _remove(self, drop):
+        """Rewrite the journal without the entries for which drop(entry) is true"""
+        with self._journal():
+            entries = self._read_journal()
+            kept = [e for e in entries if not drop(e)]
+            if len(kept) != len(entries):
+                self._rewrite_journal(kept)
+
+    # ---------------- Public API ----------------
+    def enqueue(self, table, row):
+        entry = {
+            "id": uuid.uuid4().hex,
+            "table": table,
+            "row": json.loads(json.dumps(list(row), default=_to_json)),
+        }
+        with self._journal():
+            self._append_journal(entry)
+        with self._cond:
+            self._queued += 1
+            if self._queued >= self.batch_size:
+                self._cond.notify()
+
+    def pending(self, table, user=None):
+        """Rows not yet flushed (by any process), optionally only one user's (first
+        column is the user)"""
+        return [
+            e["row"] for e in self._locked_read()
+            if e["table"] == table and (user is None or e["row"][0] == user)
+        ]
+
+    def discard(self, table, user):
+        """Drop one user's queued rows, after any flush in progress has finished"""
+        with self._flushing():
+            self._remove(lambda e: e["table"] == table and e["row"][0] == user)
+
+    def clear(self, table, user):
+        """Drop one user's queued rows and clear their stored ones, with no flush in
+        between that could write queued rows back"""
+        with self._flushing():
+            self._remove(lambda e: e["table"] == table and e["row"][0] == user)
+            self.store.clear(table, user)
+
+    def flush(self):
+        """Write everything queued so far; returns False if the store rejected part of it"""
+        with self._flushing():
+            with self._cond:
+                self._queued = 0
+            batch = self._locked_read()
+            if not batch:
+                return True
+
+            by_table = {}
+            for entry in batch:
+                by_table.setdefault(entry["table"], []).append(entry)
+            written = set()
+            ok = True
+            for table, entries in by_table.items():
+                try:
+                    self.store.append_many(table, [e["row"] for e in entries])
+                except Exception as e:
+                    self.last_error = e
+                    ok = False
+                    break
+                written.update(e["id"] for e in entries)
+
+            if written:
+                self._remove(lambda e: e["id"] in written)
+            if ok:
+                self._failures = 0
+                self.last_error = None
+            else:
+                self._failures += 1
+                with self._cond:
+                    self._queued += len(batch)
+            return ok
+
+    def close(self, timeout=10.0):
+        """Stop the worker and flush what is left (registered with atexit)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._worker.join(timeout)
+        self.flush()
+
+    # ---------------- Worker ----------------
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._failures:
+                    wait = min(self.max_backoff, self.flush_interval * 2 ** self._failures)
+                else:
+                    wait = self.flush_interval
+                deadline = time.monotonic() + wait
+                # While the store is failing, wait out the backoff even if the queue is full
+                while not self._closed and (self._failures or self._queued < self.batch_size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()